@@ -7,4 +7,6 @@ User = get_user_model()
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ("user", "full_name", "location")
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
     search_fields = ("user__username", "full_name", "location")
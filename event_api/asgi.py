@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'event_api.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after the app registry is ready
+from events.stream import with_event_streams  # noqa: E402
+
+application = with_event_streams(django_application)
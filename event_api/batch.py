@@ -0,0 +1,163 @@
+import contextlib
+import contextvars
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections, transaction
+from django.urls import Resolver404, resolve
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from events.cache import batch_cache
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+ALLOWED_PREFIXES = ("/api/events/", "/api/accounts/")
+
+
+class BatchView(APIView):
+    """
+    Run several API calls in one round trip.
+
+    The caller is authenticated once and each sub-request is dispatched straight
+    to its view with that identity, skipping middleware and re-authentication.
+    Consecutive reads run concurrently; writes run one at a time in order and
+    see the effect of everything before them. A sub-request that raises is
+    reported as a 500 in its own slot. With ``"atomic": true`` the whole batch
+    runs sequentially in a single transaction that is rolled back, and the
+    remaining sub-requests skipped, as soon as a write fails or anything errors.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get("requests")
+        max_requests = getattr(settings, "BATCH_MAX_REQUESTS", 20)
+        if not isinstance(items, list) or not items:
+            return Response({"requests": "A non-empty list of sub-requests is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > max_requests:
+            return Response({"requests": f"At most {max_requests} sub-requests per batch."}, status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(item, dict) and isinstance(item.get("path"), str) for item in items):
+            return Response({"requests": "Each sub-request needs a path."}, status=status.HTTP_400_BAD_REQUEST)
+
+        with batch_cache() as cache:
+            if request.data.get("atomic"):
+                responses = self.run_atomic(request, items, cache)
+            else:
+                responses = self.run_pipelined(request, items, cache)
+
+        for item, response in zip(items, responses):
+            if "id" in item:
+                response["id"] = item["id"]
+        return Response({"responses": responses})
+
+    def run_atomic(self, request, items, cache):
+        responses = []
+        with transaction.atomic():
+            for item in items:
+                response = self.dispatch_item(request, item)
+                responses.append(response)
+                safe = self.is_safe(item)
+                if not safe:
+                    cache.clear()
+                if response["status"] >= 500 or (not safe and response["status"] >= 400):
+                    transaction.set_rollback(True)
+                    break
+        skipped = {"status": status.HTTP_424_FAILED_DEPENDENCY, "body": {"detail": "Skipped, an earlier sub-request failed."}}
+        return responses + [dict(skipped) for _ in items[len(responses):]]
+
+    def run_pipelined(self, request, items, cache):
+        responses = [None] * len(items)
+        reads = []
+        workers = getattr(settings, "BATCH_MAX_WORKERS", 4)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            try:
+                for index, item in enumerate(items + [None]):
+                    if item is not None and self.is_safe(item):
+                        reads.append(index)
+                        continue
+                    # A write (or the end of the batch) waits for the reads queued before it
+                    context = contextvars.copy_context()
+                    futures = {i: pool.submit(context.copy().run, self.dispatch_item, request, items[i]) for i in reads}
+                    for i, future in futures.items():
+                        responses[i] = future.result()
+                    reads = []
+                    if item is not None:
+                        responses[index] = self.dispatch_item(request, item)
+                        cache.clear()
+            finally:
+                self.close_pool_connections(pool, workers)
+        return responses
+
+    def close_pool_connections(self, pool, workers):
+        # Pool threads open their own connections and keep them for the whole batch.
+        # The barrier holds each thread until all have arrived, so every one runs exactly one close.
+        barrier = threading.Barrier(workers)
+
+        def close():
+            barrier.wait()
+            connections.close_all()
+
+        for future in [pool.submit(close) for _ in range(workers)]:
+            future.result()
+
+    def is_safe(self, item):
+        return str(item.get("method", "GET")).upper() in SAFE_METHODS
+
+    def dispatch_item(self, request, item):
+        method = str(item.get("method", "GET")).upper()
+        path, _, query = item["path"].partition("?")
+        if not path.startswith(ALLOWED_PREFIXES):
+            return {"status": status.HTTP_400_BAD_REQUEST, "body": {"detail": "Path is not available in batches."}}
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return {"status": status.HTTP_404_NOT_FOUND, "body": {"detail": "Not found."}}
+
+        sub_request = self.build_request(request, method, path, query, item.get("body"))
+        try:
+            # A failing write is undone on its own, not left half-applied
+            with contextlib.nullcontext() if method in SAFE_METHODS else transaction.atomic():
+                response = match.func(sub_request, *match.args, **match.kwargs)
+                if hasattr(response, "render"):
+                    response.render()
+        except Exception:
+            logger.exception("Batch sub-request %s %s failed", method, path)
+            return {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "body": {"detail": "Internal server error."}}
+        if hasattr(response, "data"):
+            body = response.data
+        elif response.get("Content-Type", "").startswith("application/json"):
+            body = json.loads(response.content or b"null")
+        else:
+            body = response.content.decode(response.charset or "utf-8")
+        return {"status": response.status_code, "body": body}
+
+    def build_request(self, request, method, path, query, body):
+        payload = json.dumps(body).encode() if body is not None else b""
+        environ = {
+            key: value for key, value in request.META.items()
+            if key.startswith(("HTTP_", "SERVER_", "REMOTE_"))
+        }
+        environ.update({
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(payload)),
+            "wsgi.input": BytesIO(payload),
+            "wsgi.url_scheme": request.scheme,
+        })
+        sub_request = WSGIRequest(environ)
+        sub_request.session = getattr(request._request, "session", None)
+        # Reuse the identity established for the batch instead of re-verifying the token
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        return sub_request
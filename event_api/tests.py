@@ -0,0 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from events.models import Event, RSVP, Review
+from events.views import ReviewStatsView
+
+
+class BatchTests(TransactionTestCase):
+    # Concurrent reads run on their own threads and connections, so data has to be committed
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        start = timezone.now() + timedelta(days=1)
+        self.event = Event.objects.create(
+            title="Meetup", organizer=User.objects.create_user("bob"), start_time=start, end_time=start + timedelta(hours=2),
+        )
+
+    def batch(self, *requests, atomic=False):
+        response = self.client.post("/api/batch/", {"atomic": atomic, "requests": list(requests)}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.data["responses"]
+
+    def test_event_page_in_one_round_trip(self):
+        responses = self.batch(
+            {"id": "event", "path": f"/api/events/{self.event.pk}/"},
+            {"path": f"/api/events/{self.event.pk}/reviews/"},
+            {"path": "/api/accounts/profile/"},
+            {"method": "POST", "path": f"/api/events/{self.event.pk}/rsvp/", "body": {"status": "Going"}},
+        )
+
+        self.assertEqual([response["status"] for response in responses], [200, 200, 200, 201])
+        self.assertEqual(responses[0]["id"], "event")
+        self.assertEqual(responses[0]["body"]["title"], "Meetup")
+
+    def test_reads_after_a_write_see_it(self):
+        schedule = {"path": "/api/events/schedule/"}
+        responses = self.batch(
+            schedule,
+            {"method": "POST", "path": f"/api/events/{self.event.pk}/rsvp/", "body": {"status": "Going"}},
+            schedule,
+        )
+
+        self.assertEqual(len(responses[0]["body"]["events"]), 0)
+        self.assertEqual(len(responses[2]["body"]["events"]), 1)
+
+    def test_failing_sub_request_is_reported_in_its_slot(self):
+        with mock.patch.object(ReviewStatsView, "get", side_effect=RuntimeError("boom")), \
+                self.assertLogs("event_api.batch", "ERROR"):
+            responses = self.batch(
+                {"method": "POST", "path": f"/api/events/{self.event.pk}/rsvp/", "body": {"status": "Going"}},
+                {"path": f"/api/events/{self.event.pk}/reviews/stats/"},
+                {"path": f"/api/events/{self.event.pk}/"},
+            )
+
+        self.assertEqual([response["status"] for response in responses], [201, 500, 200])
+        self.assertTrue(RSVP.objects.exists())
+
+    def test_atomic_batch_rolls_back_on_failed_write(self):
+        responses = self.batch(
+            {"method": "POST", "path": f"/api/events/{self.event.pk}/rsvp/", "body": {"status": "Going"}},
+            {"method": "POST", "path": f"/api/events/{self.event.pk}/reviews/", "body": {"rating": 9}},
+            {"path": f"/api/events/{self.event.pk}/"},
+            atomic=True,
+        )
+
+        self.assertEqual([response["status"] for response in responses], [201, 400, 424])
+        self.assertFalse(RSVP.objects.exists())
+        self.assertFalse(Review.objects.exists())
+
+    def test_atomic_batch_rolls_back_on_error(self):
+        with mock.patch.object(ReviewStatsView, "get", side_effect=RuntimeError("boom")), \
+                self.assertLogs("event_api.batch", "ERROR"):
+            responses = self.batch(
+                {"method": "POST", "path": f"/api/events/{self.event.pk}/rsvp/", "body": {"status": "Going"}},
+                {"path": f"/api/events/{self.event.pk}/reviews/stats/"},
+                atomic=True,
+            )
+
+        self.assertEqual([response["status"] for response in responses], [201, 500])
+        self.assertFalse(RSVP.objects.exists())
+
+    def test_paths_outside_the_api_are_refused(self):
+        responses = self.batch({"path": "/admin/"})
+
+        self.assertEqual(responses[0]["status"], 400)
@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .batch import BatchView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -16,6 +17,9 @@ urlpatterns = [
     
     # Events API
     path('api/events/', include('events.urls')),
+
+    # Several API calls in one round trip
+    path('api/batch/', BatchView.as_view(), name='batch'),
 ]
 
 if settings.DEBUG:
@@ -1,19 +1,114 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+from . import stream
 from .models import Event, RSVP, Review
+from .tasks import enqueue_invite_notifications
+
+User = get_user_model()
+
+class EstimatedCountPaginator(Paginator):
+    # Unfiltered changelists on big tables use the planner's row estimate instead of COUNT(*)
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > self.exact_count_threshold:
+                return row[0]
+        return super().count
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+class EventActionForm(ActionForm):
+    usernames = forms.CharField(
+        required=False,
+        help_text="Comma-separated usernames, used by the invite action.",
+    )
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(ScalableModelAdmin):
     list_display = ("title", "organizer", "start_time", "end_time", "is_public")
     list_filter = ("is_public", "start_time")
+    list_select_related = ("organizer",)
     search_fields = ("title", "description", "location", "organizer__username")
+    autocomplete_fields = ("organizer",)
+    # A raw id list stays small where a <select> would render every user
+    raw_id_fields = ("invited",)
+    action_form = EventActionForm
+    actions = ("invite_users",)
+
+    @admin.action(description="Invite the listed usernames to the selected events")
+    def invite_users(self, request, queryset):
+        usernames = [name.strip() for name in request.POST.get("usernames", "").split(",") if name.strip()]
+        user_ids = list(User.objects.filter(username__in=usernames).values_list("id", flat=True))
+        if not user_ids:
+            self.message_user(request, "No matching usernames were given.", messages.WARNING)
+            return
+
+        event_ids = list(queryset.values_list("id", flat=True))
+        Invite = Event.invited.through
+        existing = set(
+            Invite.objects.filter(event_id__in=event_ids, user_id__in=user_ids).values_list("event_id", "user_id")
+        )
+        new_invites = {}
+        for event_id in event_ids:
+            for user_id in user_ids:
+                if (event_id, user_id) not in existing:
+                    new_invites.setdefault(event_id, []).append(user_id)
+        with transaction.atomic():
+            Invite.objects.bulk_create(
+                (Invite(event_id=event_id, user_id=user_id) for event_id, ids in new_invites.items() for user_id in ids),
+                batch_size=5000,
+                ignore_conflicts=True,
+            )
+            # bulk_create skips m2m_changed, so queue the invite notifications here
+            enqueue_invite_notifications(new_invites)
+            # Bump updated_at so the new invitees pick the events up through /sync/
+            Event.objects.filter(id__in=event_ids).update(updated_at=timezone.now())
+        self.message_user(request, f"Invited {len(user_ids)} users to {len(event_ids)} events.", messages.SUCCESS)
+
+def _set_rsvp_status(status):
+    @admin.action(description=f"Mark selected RSVPs as {status}")
+    def action(modeladmin, request, queryset):
+        with transaction.atomic():
+            rsvps = list(queryset.exclude(status=status).values_list("pk", "event_id", "user_id"))
+            updated = RSVP.objects.filter(pk__in=[pk for pk, _, _ in rsvps]).update(status=status, updated_at=timezone.now())
+            # update() skips post_save, so the organizers' change streams are told here
+            for pk, event_id, user_id in rsvps:
+                stream.notify("rsvp", "updated", event_id, pk, user=user_id, status=status)
+        modeladmin.message_user(request, f"Marked {updated} RSVPs as {status}.", messages.SUCCESS)
+
+    action.__name__ = f"mark_{status.lower().replace(' ', '_')}"
+    return action
 
 @admin.register(RSVP)
-class RSVPAdmin(admin.ModelAdmin):
+class RSVPAdmin(ScalableModelAdmin):
     list_display = ("event", "user", "status", "updated_at")
     list_filter = ("status",)
+    list_select_related = ("event", "user")
     search_fields = ("event__title", "user__username")
+    autocomplete_fields = ("event", "user")
+    actions = [_set_rsvp_status(status) for status, _ in RSVP.STATUS_CHOICES]
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(ScalableModelAdmin):
     list_display = ("event", "user", "rating", "created_at")
+    list_select_related = ("event", "user")
     search_fields = ("event__title", "user__username", "comment")
+    autocomplete_fields = ("event", "user")
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'events'
\ No newline at end of file
+    name = 'events'
+
+    def ready(self):
+        import events.signals
@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ArchivedEvent, ArchivedReview, ArchivedRSVP, Event, Review, RSVP
+
+EVENT_FIELDS = (
+    "id", "title", "description", "organizer_id", "location", "latitude", "longitude", "geo_cell",
+    "start_time", "end_time", "is_public", "created_at", "updated_at",
+)
+RSVP_FIELDS = ("id", "event_id", "user_id", "status", "updated_at")
+REVIEW_FIELDS = ("id", "event_id", "user_id", "rating", "comment", "created_at", "updated_at")
+
+
+def archive_horizon():
+    return timezone.now() - timedelta(days=getattr(settings, "EVENTS_ARCHIVE_AFTER_DAYS", 365))
+
+
+def _copy(source, target, fields, chunk_size):
+    batch = []
+    for row in source.order_by().values(*fields).iterator(chunk_size=chunk_size):
+        batch.append(target(**row))
+        if len(batch) >= chunk_size:
+            target.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    target.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def archive_batch(horizon, batch_size=500, chunk_size=2000):
+    """
+    Move up to ``batch_size`` events that ended before ``horizon`` into the archive.
+
+    Each batch commits on its own and the archive inserts ignore rows that are
+    already there, so an interrupted run simply picks up where it stopped.
+    Locked events are skipped so concurrent runs do not block each other.
+    """
+    with transaction.atomic():
+        ids = list(
+            Event.objects.filter(end_time__lt=horizon).order_by("end_time", "pk")
+            .select_for_update(skip_locked=True).values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+
+        _copy(Event.objects.filter(pk__in=ids), ArchivedEvent, EVENT_FIELDS, chunk_size)
+        _copy(
+            Event.invited.through.objects.filter(event_id__in=ids).annotate(archivedevent_id=F("event_id")),
+            ArchivedEvent.invited.through, ("archivedevent_id", "user_id"), chunk_size,
+        )
+        _copy(RSVP.objects.filter(event_id__in=ids), ArchivedRSVP, RSVP_FIELDS, chunk_size)
+        _copy(Review.objects.filter(event_id__in=ids), ArchivedReview, REVIEW_FIELDS, chunk_size)
+
+        # Cascades to RSVPs, reviews, invites and rating stats
+        Event.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_events(horizon=None, batch_size=500, pause=0.0, max_batches=None, progress=None):
+    horizon = horizon or archive_horizon()
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        archived = archive_batch(horizon, batch_size)
+        if not archived:
+            break
+        total += archived
+        batches += 1
+        if progress:
+            progress(total)
+        # Throttle so the hot tables are not hammered while serving traffic
+        if pause:
+            time.sleep(pause)
+    return total
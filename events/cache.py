@@ -0,0 +1,42 @@
+import contextlib
+import contextvars
+import threading
+
+_current_cache = contextvars.ContextVar("batch_cache", default=None)
+
+
+class BatchCache:
+    """Lookups shared by the sub-requests of one batch; cleared after every write."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get_or_set(self, key, factory):
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+        value = factory()
+        with self._lock:
+            return self._values.setdefault(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+@contextlib.contextmanager
+def batch_cache():
+    """Make a fresh ``BatchCache`` current for the duration of the block."""
+    cache = BatchCache()
+    token = _current_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _current_cache.reset(token)
+
+
+def batch_cached(key, factory):
+    """``factory()``, memoized for the rest of the batch when called inside one."""
+    cache = _current_cache.get()
+    return factory() if cache is None else cache.get_or_set(key, factory)
@@ -0,0 +1,115 @@
+import csv
+import math
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+DEFAULT_GAZETTEER = Path(__file__).resolve().parent / "data" / "gazetteer.csv"
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """Height and width in degrees of a geohash cell."""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes whose cells cover the circle around the point.
+
+    Picks the finest precision whose cells are at least ``radius_km`` across,
+    so the cell containing the point plus its eight neighbours always contain
+    the circle. Returns ``None`` when the radius is too large for that.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        # Longitude degrees shrink towards the poles; use the circle's widest latitude.
+        edge_latitude = min(abs(latitude) + radius_km / KM_PER_DEGREE, 89.9)
+        if height * KM_PER_DEGREE >= radius_km and width * KM_PER_DEGREE * math.cos(math.radians(edge_latitude)) >= radius_km:
+            break
+    else:
+        return None
+
+    cells = set()
+    for dlat in (-height, 0, height):
+        for dlng in (-width, 0, width):
+            lat = max(-90.0, min(90.0, latitude + dlat))
+            lng = (longitude + dlng + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(lat, lng, precision))
+    return sorted(cells)
+
+
+def haversine_km(latitude, longitude):
+    """Database expression for the distance of each row from the point."""
+    half_dlat = Radians(F("latitude") - latitude) / 2
+    half_dlng = Radians(F("longitude") - longitude) / 2
+    a = Power(Sin(half_dlat), 2) + Value(math.cos(math.radians(latitude))) * Cos(Radians(F("latitude"))) * Power(Sin(half_dlng), 2)
+    return ExpressionWrapper(Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a)), output_field=FloatField())
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """Prune by geohash cell on the indexed column, then refine by exact distance."""
+    cells = covering_cells(latitude, longitude, radius_km)
+    if cells is None:
+        queryset = queryset.filter(latitude__isnull=False)
+    else:
+        prefix = Q()
+        for cell in cells:
+            prefix |= Q(geo_cell__startswith=cell)
+        queryset = queryset.filter(prefix)
+    return queryset.annotate(distance_km=haversine_km(latitude, longitude)).filter(distance_km__lte=radius_km)
+
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """Place name -> (latitude, longitude) from a ``name,latitude,longitude`` CSV."""
+    path = getattr(settings, "EVENTS_GAZETTEER_PATH", None) or DEFAULT_GAZETTEER
+    places = {}
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            places.setdefault(_normalize(row["name"]), (float(row["latitude"]), float(row["longitude"])))
+    return places
+
+
+def geocode(location):
+    """Resolve free-text ``location`` offline, trying the whole text then each comma-separated part."""
+    text = _normalize(location or "")
+    if not text:
+        return None
+    places = load_gazetteer()
+    for candidate in [text, *(part.strip() for part in text.split(","))]:
+        if candidate in places:
+            return places[candidate]
+    return None
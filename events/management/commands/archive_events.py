@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from events.archive import archive_events, archive_horizon
+
+
+class Command(BaseCommand):
+    help = "Move events that ended before the archive horizon, with their RSVPs, reviews and invites, to the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, help="Defaults to EVENTS_ARCHIVE_AFTER_DAYS (365).")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--sleep", type=float, default=0.5, help="Seconds to pause between batches.")
+        parser.add_argument("--max-batches", type=int)
+
+    def handle(self, *args, **options):
+        if options["older_than_days"] is not None:
+            horizon = timezone.now() - timedelta(days=options["older_than_days"])
+        else:
+            horizon = archive_horizon()
+
+        total = archive_events(
+            horizon=horizon,
+            batch_size=options["batch_size"],
+            pause=options["sleep"],
+            max_batches=options["max_batches"],
+            progress=lambda done: self.stdout.write(f"Archived {done} events..."),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} events that ended before {horizon:%Y-%m-%d %H:%M}."))
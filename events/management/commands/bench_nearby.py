@@ -0,0 +1,89 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from events.geo import encode_geohash, haversine_km, within_radius
+from events.models import Event
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ?near= radius queries against synthetic events. Everything runs in a "
+        "transaction that is rolled back, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=1_000_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--radius-km", type=float, default=10)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--compare-full-scan", action="store_true",
+                            help="Also time the same queries without the grid-cell prune.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        # Cluster events around a few hundred "cities" like real data, not uniformly
+        centres = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(500)]
+
+        with transaction.atomic():
+            self.seed(rng, centres, options["events"], options["batch_size"])
+            points = [self.jitter(rng, *rng.choice(centres), spread=0.2) for _ in range(options["queries"])]
+            radius_km = options["radius_km"]
+
+            self.report("grid + haversine", points, lambda lat, lng: within_radius(
+                Event.objects.all(), lat, lng, radius_km,
+            ).order_by("distance_km")[:10])
+            if options["compare_full_scan"]:
+                self.report("haversine only", points, lambda lat, lng: Event.objects.annotate(
+                    distance_km=haversine_km(lat, lng),
+                ).filter(distance_km__lte=radius_km).order_by("distance_km")[:10])
+
+            transaction.set_rollback(True)
+
+    def jitter(self, rng, latitude, longitude, spread):
+        return (
+            max(-90.0, min(90.0, latitude + rng.gauss(0, spread))),
+            (longitude + rng.gauss(0, spread) + 180.0) % 360.0 - 180.0,
+        )
+
+    def seed(self, rng, centres, count, batch_size):
+        organizer = User.objects.create(username=f"bench-nearby-{time.time_ns()}")
+        now = timezone.now()
+        started = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            batch = []
+            for _ in range(min(batch_size, count - offset)):
+                latitude, longitude = self.jitter(rng, *rng.choice(centres), spread=0.5)
+                start = now + timedelta(hours=rng.randrange(24 * 365))
+                batch.append(Event(
+                    title="bench", organizer=organizer, start_time=start, end_time=start + timedelta(hours=2),
+                    latitude=latitude, longitude=longitude, geo_cell=encode_geohash(latitude, longitude),
+                ))
+            # bulk_create skips the save() signals, so nothing is geocoded or broadcast
+            Event.objects.bulk_create(batch)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Event._meta.db_table}")
+        self.stdout.write(f"Seeded {count} events in {time.perf_counter() - started:.1f}s")
+
+    def report(self, label, points, build_query):
+        timings, hits = [], 0
+        for latitude, longitude in points:
+            started = time.perf_counter()
+            hits += len(list(build_query(latitude, longitude)))
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f"{label}: {len(points)} queries, mean {statistics.mean(timings):.2f} ms, "
+            f"p50 {timings[len(timings) // 2]:.2f} ms, p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, "
+            f"{hits / len(points):.1f} results/query"
+        )
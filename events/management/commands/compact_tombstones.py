@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from events.models import Tombstone
+from events.sync import tombstone_retention
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than the retention window."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - tombstone_retention()
+        batch_size = options["batch_size"]
+        total = 0
+        while True:
+            ids = list(
+                Tombstone.objects.filter(deleted_at__lt=cutoff)
+                .order_by("deleted_at").values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            deleted, _ = Tombstone.objects.filter(id__in=ids).delete()
+            total += deleted
+        self.stdout.write(self.style.SUCCESS(f"Removed {total} tombstones older than {cutoff:%Y-%m-%d %H:%M}."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from events.geo import encode_geohash, geocode
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = "Fill in coordinates and grid cells of events that have a location but no coordinates yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        located = last_pk = 0
+        while True:
+            events = list(
+                Event.objects.filter(pk__gt=last_pk, geo_cell="").exclude(location="")
+                .order_by("pk").only("pk", "location", "latitude", "longitude")[:batch_size]
+            )
+            if not events:
+                break
+            last_pk = events[-1].pk
+            changed = []
+            for event in events:
+                if event.latitude is None or event.longitude is None:
+                    event.latitude, event.longitude = geocode(event.location) or (None, None)
+                if event.latitude is not None:
+                    event.geo_cell = encode_geohash(event.latitude, event.longitude)
+                    changed.append(event)
+            # bulk_update skips save(), so updated_at is left alone
+            Event.objects.bulk_update(changed, ["latitude", "longitude", "geo_cell"])
+            located += len(changed)
+        self.stdout.write(self.style.SUCCESS(f"Located {located} events."))
@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from events.trending import refresh_trending
+
+
+class Command(BaseCommand):
+    help = "Recompute trending scores from recent RSVP and review activity and drop events that decayed out."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window-hours", type=float, help="Activity to consider, default 7 half-lives.")
+
+    def handle(self, *args, **options):
+        window = timedelta(hours=options["window_hours"]) if options["window_hours"] else None
+        scored, removed = refresh_trending(window=window)
+        self.stdout.write(self.style.SUCCESS(f"Scored {scored} trending events, removed {removed}."))
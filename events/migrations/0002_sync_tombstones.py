@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-19 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('event', 'Event'), ('rsvp', 'RSVP'), ('review', 'Review')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('event_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='rsvp',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-19 02:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_stats(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    Review = apps.get_model('events', 'Review')
+    EventRatingStats = apps.get_model('events', 'EventRatingStats')
+    prior_mean = float(getattr(settings, 'EVENTS_RATING_PRIOR_MEAN', 3.0))
+    prior_weight = float(getattr(settings, 'EVENTS_RATING_PRIOR_WEIGHT', 5))
+
+    aggregates = {
+        row.pop('event_id'): row
+        for row in Review.objects.order_by().values('event_id').annotate(
+            count=Count('id'),
+            total=Sum('rating'),
+            **{f'star_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)},
+        )
+    }
+    batch = []
+    for event_id in Event.objects.values_list('pk', flat=True).iterator():
+        row = aggregates.get(event_id, {'count': 0, 'total': 0})
+        score = (prior_weight * prior_mean + row['total']) / (prior_weight + row['count'])
+        batch.append(EventRatingStats(event_id=event_id, bayesian_score=score, **row))
+        if len(batch) >= 1000:
+            EventRatingStats.objects.bulk_create(batch)
+            batch = []
+    EventRatingStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventRatingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+                ('bayesian_score', models.FloatField(db_index=True, default=0)),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating_stats', to='events.event')),
+            ],
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
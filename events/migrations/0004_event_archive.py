@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-19 02:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_rating_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='end_time',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('is_public', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('invited', models.ManyToManyField(blank=True, related_name='archived_invited_events', to=settings.AUTH_USER_MODEL)),
+                ('organizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-start_time', 'title'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedReview',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('rating', models.PositiveSmallIntegerField()),
+                ('comment', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='events.archivedevent')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedRSVP',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('Going', 'Going'), ('Maybe', 'Maybe'), ('Not Going', 'Not Going')], max_length=20)),
+                ('updated_at', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rsvps', to='events.archivedevent')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_rsvps', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
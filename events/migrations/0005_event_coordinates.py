@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='geo_cell',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
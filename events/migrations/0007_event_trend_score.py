@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 02:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventTrendScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trend_score', to='events.event')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_event_trend_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedevent',
+            name='geo_cell',
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='archivedevent',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedevent',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -9,12 +9,16 @@ class Event(models.Model):
     description = models.TextField(blank=True)
     organizer = models.ForeignKey(User, related_name='organized_events', on_delete=models.CASCADE)
     location = models.CharField(max_length=255, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Geohash of (latitude, longitude); "near me" queries prefix-scan its index
+    geo_cell = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
     start_time = models.DateTimeField()
-    end_time = models.DateTimeField()
+    end_time = models.DateTimeField(db_index=True)
     is_public = models.BooleanField(default=True)
     invited = models.ManyToManyField(User, related_name='invited_events', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['-start_time', 'title']
@@ -41,7 +45,7 @@ class RSVP(models.Model):
     event = models.ForeignKey(Event, related_name='rsvps', on_delete=models.CASCADE)
     user = models.ForeignKey(User, related_name='rsvps', on_delete=models.CASCADE)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ('event', 'user')
@@ -56,6 +60,7 @@ class Review(models.Model):
     rating = models.PositiveSmallIntegerField()
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ('event', 'user')
@@ -63,3 +68,129 @@ class Review(models.Model):
 
     def __str__(self):
         return f"Review: {self.user} -> {self.event} ({self.rating})"
+
+class Tombstone(models.Model):
+    KIND_EVENT = 'event'
+    KIND_RSVP = 'rsvp'
+    KIND_REVIEW = 'review'
+
+    KIND_CHOICES = [
+        (KIND_EVENT, 'Event'),
+        (KIND_RSVP, 'RSVP'),
+        (KIND_REVIEW, 'Review'),
+    ]
+
+    # Plain ids rather than foreign keys: the rows they point at are gone.
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    event_id = models.BigIntegerField()
+    # For event tombstones, the one user who lost sight of the event; null means everyone
+    user_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['deleted_at']
+
+    def __str__(self):
+        return f"Tombstone: {self.kind} #{self.object_id}"
+
+class EventRatingStats(models.Model):
+    event = models.OneToOneField(Event, related_name='rating_stats', on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    star_1 = models.PositiveIntegerField(default=0)
+    star_2 = models.PositiveIntegerField(default=0)
+    star_3 = models.PositiveIntegerField(default=0)
+    star_4 = models.PositiveIntegerField(default=0)
+    star_5 = models.PositiveIntegerField(default=0)
+    bayesian_score = models.FloatField(default=0, db_index=True)
+
+    def __str__(self):
+        return f"Ratings: {self.event} ({self.count})"
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    @property
+    def histogram(self):
+        return {str(star): getattr(self, f"star_{star}") for star in range(1, 6)}
+
+
+# Archive tables for events that ended long ago, see events/archive.py. Rows keep
+# their original ids so /api/events/{id}/ can fall through to them.
+
+class ArchivedEvent(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    organizer = models.ForeignKey(User, related_name='archived_events', on_delete=models.CASCADE)
+    location = models.CharField(max_length=255, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geo_cell = models.CharField(max_length=12, blank=True, editable=False)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    is_public = models.BooleanField(default=True)
+    invited = models.ManyToManyField(User, related_name='archived_invited_events', blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-start_time', 'title']
+
+    def __str__(self):
+        return f"{self.title} ({self.start_time:%Y-%m-%d %H:%M}, archived)"
+
+class ArchivedRSVP(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    event = models.ForeignKey(ArchivedEvent, related_name='rsvps', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='archived_rsvps', on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=RSVP.STATUS_CHOICES)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Archived RSVP: {self.user} -> {self.event} ({self.status})"
+
+class ArchivedReview(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    event = models.ForeignKey(ArchivedEvent, related_name='reviews', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='archived_reviews', on_delete=models.CASCADE)
+    rating = models.PositiveSmallIntegerField()
+    comment = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Archived review: {self.user} -> {self.event} ({self.rating})"
+
+class Notification(models.Model):
+    VERB_INVITED = 'invited'
+    VERB_UPDATED = 'updated'
+
+    VERB_CHOICES = [
+        (VERB_INVITED, 'Invited'),
+        (VERB_UPDATED, 'Updated'),
+    ]
+
+    user = models.ForeignKey(User, related_name='notifications', on_delete=models.CASCADE)
+    event = models.ForeignKey(Event, related_name='notifications', on_delete=models.CASCADE)
+    verb = models.CharField(max_length=20, choices=VERB_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['user', '-created_at'], name='events_notif_user_idx')]
+
+    def __str__(self):
+        return f"Notification: {self.user} {self.verb} {self.event}"
+
+class EventTrendScore(models.Model):
+    event = models.OneToOneField(Event, related_name='trend_score', on_delete=models.CASCADE)
+    # Log of the event's time-decayed activity, see events/trending.py
+    score = models.FloatField(db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Trending: {self.event} ({self.score:.2f})"
@@ -1,4 +1,11 @@
 from rest_framework import permissions
+from .cache import batch_cached
+
+def is_invited(event, user):
+    return batch_cached(
+        ("invited", event.pk, user.pk),
+        lambda: event.invited.filter(id=user.id).exists(),
+    )
 
 class IsOrganizerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -20,4 +27,4 @@ class IsEventPublicOrInvited(permissions.BasePermission):
         if request.user == obj.organizer:
             return True
         # Invited users can see private event
-        return obj.invited.filter(id=request.user.id).exists()
\ No newline at end of file
+        return is_invited(obj, request.user)
\ No newline at end of file
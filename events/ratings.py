@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum, Value
+
+from .models import Event, EventRatingStats, Review
+
+STARS = range(1, 6)
+
+
+def rating_prior():
+    """The (mean, weight) pair every event's score is shrunk towards."""
+    return (
+        float(getattr(settings, "EVENTS_RATING_PRIOR_MEAN", 3.0)),
+        float(getattr(settings, "EVENTS_RATING_PRIOR_WEIGHT", 5)),
+    )
+
+
+def bayesian_score(count, total):
+    mean, weight = rating_prior()
+    return (weight * mean + total) / (weight + count)
+
+
+def apply_rating_change(event_id, rating, delta):
+    """Add (``delta=1``) or remove (``delta=-1``) one rating with a single UPDATE."""
+    mean, weight = rating_prior()
+    changes = {
+        "count": F("count") + delta,
+        "total": F("total") + rating * delta,
+        # Right-hand F() expressions see the row as it was before this UPDATE
+        "bayesian_score": ExpressionWrapper(
+            (Value(weight * mean) + F("total") + rating * delta) / (Value(weight) + F("count") + delta),
+            output_field=FloatField(),
+        ),
+    }
+    if rating in STARS:
+        changes[f"star_{rating}"] = F(f"star_{rating}") + delta
+    if not EventRatingStats.objects.filter(event_id=event_id).update(**changes):
+        rebuild_rating_stats(Event.objects.filter(pk=event_id))
+
+
+def rebuild_rating_stats(events=None, batch_size=1000):
+    """Recompute stats from the reviews themselves, e.g. after changing the prior."""
+    events = Event.objects.all() if events is None else events
+    event_ids = list(events.order_by("pk").values_list("pk", flat=True))
+    rebuilt = 0
+    for start in range(0, len(event_ids), batch_size):
+        batch = event_ids[start:start + batch_size]
+        aggregates = {
+            row.pop("event_id"): row
+            for row in Review.objects.filter(event_id__in=batch).order_by().values("event_id").annotate(
+                count=Count("id"),
+                total=Sum("rating"),
+                **{f"star_{star}": Count("id", filter=Q(rating=star)) for star in STARS},
+            )
+        }
+        stats = []
+        for event_id in batch:
+            row = aggregates.get(event_id, {"count": 0, "total": 0})
+            row["total"] = row["total"] or 0
+            stats.append(EventRatingStats(
+                event_id=event_id, bayesian_score=bayesian_score(row["count"], row["total"]), **row,
+            ))
+        EventRatingStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=["event"],
+            update_fields=["count", "total", "bayesian_score", *(f"star_{star}" for star in STARS)],
+        )
+        rebuilt += len(stats)
+    return rebuilt
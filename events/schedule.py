@@ -0,0 +1,46 @@
+import heapq
+
+from django.db.models import OuterRef, Q, Subquery
+
+from .models import Event, RSVP
+
+COMMITTED_STATUSES = (RSVP.STATUS_GOING, RSVP.STATUS_MAYBE)
+
+
+def commitments(user, start, end):
+    """Events ``user`` organizes or is going/maybe going to that overlap [start, end)."""
+    rsvp_events = RSVP.objects.filter(user=user, status__in=COMMITTED_STATUSES).values("event_id")
+    return (
+        Event.objects.filter(start_time__lt=end, end_time__gt=start)
+        .filter(Q(organizer=user) | Q(id__in=rsvp_events))
+        .annotate(rsvp_status=Subquery(RSVP.objects.filter(event=OuterRef("pk"), user=user).values("status")[:1]))
+        .only("id", "title", "location", "start_time", "end_time", "organizer_id")
+        .order_by("start_time", "end_time", "id")
+    )
+
+
+def mark_overlaps(events):
+    """
+    Set ``event.conflicts`` to the ids of the other events overlapping it.
+
+    Sweeps the intervals in start order, keeping a heap of the ones still in
+    progress; O(n log n + k) for k overlapping pairs. Back-to-back events,
+    where one ends exactly when the next starts, do not conflict.
+    """
+    ordered = sorted(events, key=lambda event: (event.start_time, event.end_time, event.pk))
+    active = []
+    for event in ordered:
+        event.conflicts = []
+    for index, event in enumerate(ordered):
+        while active and active[0][0] <= event.start_time:
+            heapq.heappop(active)
+        for _, other_index in active:
+            other = ordered[other_index]
+            other.conflicts.append(event.pk)
+            event.conflicts.append(other.pk)
+        heapq.heappush(active, (event.end_time, index))
+    return ordered
+
+
+def conflicts_with(user, event):
+    return list(commitments(user, event.start_time, event.end_time).exclude(pk=event.pk))
@@ -1,28 +1,60 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from .models import Event, RSVP, Review
+from .models import ArchivedEvent, Event, EventRatingStats, Notification, RSVP, Review
+from .permissions import is_invited
 from accounts.serializers import UserSerializer
 
 User = get_user_model()
 
+class RatingStatsSerializer(serializers.ModelSerializer):
+    mean = serializers.FloatField(read_only=True)
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = EventRatingStats
+        fields = ("count", "mean", "histogram", "bayesian_score")
+
+def wants_rating_stats(request):
+    return request is not None and request.query_params.get("include_ratings") in ("1", "true")
+
 class EventSerializer(serializers.ModelSerializer):
     organizer = UserSerializer(read_only=True)
     invited = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), many=True, required=False)
+    latitude = serializers.FloatField(min_value=-90, max_value=90, required=False, allow_null=True)
+    longitude = serializers.FloatField(min_value=-180, max_value=180, required=False, allow_null=True)
+    distance_km = serializers.FloatField(read_only=True)
+    rating_stats = RatingStatsSerializer(read_only=True)
 
     class Meta:
         model = Event
         fields = (
-            "id", "title", "description", "organizer", "location",
+            "id", "title", "description", "organizer", "location", "latitude", "longitude",
             "start_time", "end_time", "is_public", "invited",
-            "created_at", "updated_at",
+            "created_at", "updated_at", "distance_km", "rating_stats",
         )
         read_only_fields = ("id", "created_at", "updated_at", "organizer")
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        # The ratings block is opt-in with ?include_ratings=1
+        if not wants_rating_stats(request):
+            self.fields.pop("rating_stats")
+        # Only ?near= queries annotate a distance
+        if request is None or "near" not in request.query_params:
+            self.fields.pop("distance_km")
+
     def validate(self, attrs):
         start = attrs.get("start_time", getattr(self.instance, "start_time", None))
         end = attrs.get("end_time", getattr(self.instance, "end_time", None))
         if start and end and end <= start:
             raise serializers.ValidationError({"end_time": "end_time must be after start_time."})
+
+        if ("latitude" in attrs) != ("longitude" in attrs):
+            raise serializers.ValidationError({"detail": "latitude and longitude must be given together."})
+        if "latitude" not in attrs and self.instance is not None and attrs.get("location", self.instance.location) != self.instance.location:
+            # Let the new location be geocoded instead of keeping the old coordinates
+            attrs["latitude"] = attrs["longitude"] = None
         return attrs
 
     def create(self, validated_data):
@@ -42,6 +74,23 @@ class EventSerializer(serializers.ModelSerializer):
             instance.invited.set(invited)
         return instance
 
+class ArchivedEventSerializer(serializers.ModelSerializer):
+    organizer = UserSerializer(read_only=True)
+    invited = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    archived = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedEvent
+        fields = (
+            "id", "title", "description", "organizer", "location", "latitude", "longitude",
+            "start_time", "end_time", "is_public", "invited",
+            "created_at", "updated_at", "archived",
+        )
+        read_only_fields = fields
+
+    def get_archived(self, obj):
+        return True
+
 class RSVPSerializer(serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
 
@@ -59,7 +108,7 @@ class RSVPSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"event": "Event must be provided."})
 
         if not event.is_public:
-            if user != event.organizer and user not in event.invited.all():
+            if user != event.organizer and not is_invited(event, user):
                 raise serializers.ValidationError({"detail": "You are not invited to this private event."})
 
         if self.instance is None:
@@ -107,3 +156,26 @@ class ReviewSerializer(serializers.ModelSerializer):
             if self.instance.user != user and request.user != event.organizer:
                 raise serializers.ValidationError({"detail": "You cannot modify someone else's review."})
         return attrs
+
+class NotificationSerializer(serializers.ModelSerializer):
+    event_title = serializers.CharField(source="event.title", read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = ("id", "event", "event_title", "verb", "created_at")
+        read_only_fields = fields
+
+class ScheduleEntrySerializer(serializers.ModelSerializer):
+    role = serializers.SerializerMethodField()
+    conflicts = serializers.ListField(child=serializers.IntegerField(), read_only=True, required=False)
+
+    class Meta:
+        model = Event
+        fields = ("id", "title", "location", "start_time", "end_time", "role", "conflicts")
+        read_only_fields = fields
+
+    def get_role(self, obj):
+        request = self.context.get("request")
+        if request is not None and obj.organizer_id == request.user.id:
+            return "Organizer"
+        return obj.rsvp_status
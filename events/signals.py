@@ -0,0 +1,204 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from . import stream
+from .geo import encode_geohash, geocode
+from .models import Event, EventRatingStats, Notification, RSVP, Review, Tombstone
+from .ratings import apply_rating_change, rating_prior
+from .tasks import enqueue_invite_notifications, notify_invitees
+from .trending import record_activity
+
+
+def _cascaded_from_event(origin):
+    # The event tombstone already tells clients to drop its RSVPs and reviews.
+    return isinstance(origin, Event) or getattr(origin, "model", None) is Event
+
+def _hide_event(pairs):
+    # Per-user event tombstones for (event_id, user_id) pairs that lost sight of the event
+    Tombstone.objects.bulk_create(
+        [Tombstone(kind=Tombstone.KIND_EVENT, object_id=event_id, event_id=event_id, user_id=user_id) for event_id, user_id in pairs],
+        batch_size=1000,
+    )
+
+
+@receiver(pre_delete, sender=Event)
+def remember_event_audience(sender, instance, **kwargs):
+    # The invites are gone by post_delete
+    instance._audience = None
+    if not instance.is_public:
+        instance._audience = [instance.organizer_id, *instance.invited.values_list("id", flat=True)]
+
+
+@receiver(post_delete, sender=Event)
+def record_event_tombstone(sender, instance, **kwargs):
+    audience = getattr(instance, "_audience", None)
+    if audience is None:
+        # A public event was visible to everyone, so everyone is told
+        Tombstone.objects.create(kind=Tombstone.KIND_EVENT, object_id=instance.pk, event_id=instance.pk)
+    else:
+        _hide_event((instance.pk, user_id) for user_id in audience)
+
+
+@receiver(pre_save, sender=Event)
+def remember_previous_visibility(sender, instance, **kwargs):
+    instance._was_public = None
+    if instance.pk is not None:
+        instance._was_public = Event.objects.filter(pk=instance.pk).values_list("is_public", flat=True).first()
+
+
+@receiver(post_save, sender=Event)
+def record_event_hidden(sender, instance, created, **kwargs):
+    # Sync skips event tombstones for events the caller can still see, so the
+    # organizer and invitees keep it while everyone else drops it.
+    if getattr(instance, "_was_public", None) and not instance.is_public:
+        Tombstone.objects.create(kind=Tombstone.KIND_EVENT, object_id=instance.pk, event_id=instance.pk)
+
+
+@receiver(m2m_changed, sender=Event.invited.through)
+def record_uninvite_tombstones(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        related = instance.invited_events if reverse else instance.invited
+        instance._cleared_invites = set(related.values_list("id", flat=True))
+        return
+    if action == "post_clear":
+        pk_set = getattr(instance, "_cleared_invites", set())
+    elif action != "post_remove":
+        return
+    if not pk_set:
+        return
+    pairs = [(event_id, instance.pk) for event_id in pk_set] if reverse else [(instance.pk, user_id) for user_id in pk_set]
+    organizers = dict(
+        Event.objects.filter(pk__in={event_id for event_id, _ in pairs}, is_public=False).values_list("pk", "organizer_id")
+    )
+    _hide_event(
+        (event_id, user_id) for event_id, user_id in pairs if event_id in organizers and organizers[event_id] != user_id
+    )
+
+
+@receiver(post_delete, sender=RSVP)
+def record_rsvp_tombstone(sender, instance, origin=None, **kwargs):
+    if _cascaded_from_event(origin):
+        return
+    Tombstone.objects.create(
+        kind=Tombstone.KIND_RSVP, object_id=instance.pk,
+        event_id=instance.event_id, user_id=instance.user_id,
+    )
+
+
+@receiver(post_delete, sender=Review)
+def record_review_tombstone(sender, instance, origin=None, **kwargs):
+    if _cascaded_from_event(origin):
+        return
+    Tombstone.objects.create(
+        kind=Tombstone.KIND_REVIEW, object_id=instance.pk,
+        event_id=instance.event_id, user_id=instance.user_id,
+    )
+
+
+@receiver(post_save, sender=Event)
+def stream_event_saved(sender, instance, created, **kwargs):
+    stream.notify("event", "created" if created else "updated", instance.pk, instance.pk)
+
+
+@receiver(post_delete, sender=Event)
+def stream_event_deleted(sender, instance, **kwargs):
+    stream.notify("event", "deleted", instance.pk, instance.pk)
+
+
+@receiver(post_save, sender=RSVP)
+def stream_rsvp_saved(sender, instance, created, **kwargs):
+    stream.notify(
+        "rsvp", "created" if created else "updated", instance.event_id, instance.pk,
+        user=instance.user_id, status=instance.status,
+    )
+
+
+@receiver(post_delete, sender=RSVP)
+def stream_rsvp_deleted(sender, instance, origin=None, **kwargs):
+    if not _cascaded_from_event(origin):
+        stream.notify("rsvp", "deleted", instance.event_id, instance.pk, user=instance.user_id)
+
+
+@receiver(post_save, sender=Review)
+def stream_review_saved(sender, instance, created, **kwargs):
+    stream.notify(
+        "review", "created" if created else "updated", instance.event_id, instance.pk,
+        user=instance.user_id, rating=instance.rating,
+    )
+
+
+@receiver(post_delete, sender=Review)
+def stream_review_deleted(sender, instance, origin=None, **kwargs):
+    if not _cascaded_from_event(origin):
+        stream.notify("review", "deleted", instance.event_id, instance.pk, user=instance.user_id)
+
+
+@receiver(post_save, sender=Event)
+def create_rating_stats(sender, instance, created, **kwargs):
+    if created:
+        EventRatingStats.objects.create(event=instance, bayesian_score=rating_prior()[0])
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = Review.objects.filter(pk=instance.pk).values_list("rating", flat=True).first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_stats(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_rating", None)
+    if previous == instance.rating:
+        return
+    if previous is not None:
+        apply_rating_change(instance.event_id, previous, -1)
+    apply_rating_change(instance.event_id, instance.rating, 1)
+
+
+@receiver(post_delete, sender=Review)
+def remove_from_rating_stats(sender, instance, origin=None, **kwargs):
+    if not _cascaded_from_event(origin):
+        apply_rating_change(instance.event_id, instance.rating, -1)
+
+
+@receiver(pre_save, sender=Event)
+def locate_event(sender, instance, **kwargs):
+    if instance.latitude is None or instance.longitude is None:
+        instance.latitude, instance.longitude = geocode(instance.location) or (None, None)
+    if instance.latitude is None:
+        instance.geo_cell = ""
+    else:
+        instance.geo_cell = encode_geohash(instance.latitude, instance.longitude)
+
+
+@receiver(post_save, sender=Event)
+def notify_invitees_of_update(sender, instance, created, **kwargs):
+    if not created:
+        notify_invitees.enqueue(event_id=instance.pk, verb=Notification.VERB_UPDATED)
+
+
+@receiver(m2m_changed, sender=Event.invited.through)
+def notify_new_invitees(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != "post_add" or not pk_set:
+        return
+    # Reverse adds come from user.invited_events.add(...), with event ids in pk_set
+    enqueue_invite_notifications({event_id: [instance.pk] for event_id in pk_set} if reverse else {instance.pk: pk_set})
+
+
+@receiver(pre_save, sender=RSVP)
+def remember_previous_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk is not None:
+        instance._previous_status = RSVP.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+
+
+@receiver(post_save, sender=RSVP)
+def rsvp_trending_activity(sender, instance, created, **kwargs):
+    if created or getattr(instance, "_previous_status", None) != instance.status:
+        record_activity(instance.event_id, instance.status)
+
+
+@receiver(post_save, sender=Review)
+def review_trending_activity(sender, instance, created, **kwargs):
+    if created:
+        record_activity(instance.event_id, "review")
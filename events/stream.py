@@ -0,0 +1,323 @@
+import asyncio
+import json
+import logging
+import re
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = re.compile(r"^/api/events/(?P<event_id>\d+)/stream/$")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Subscriber:
+    def __init__(self, maxsize):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class ChangeHub:
+    """
+    Per-process fan-out of change messages to the SSE connections of each event.
+
+    Every event with recent activity keeps a bounded ring buffer of its latest
+    messages so a reconnecting client can resume from ``Last-Event-ID``. A
+    subscriber whose queue fills up is cut off instead of being allowed to grow
+    without bound; it reconnects and catches up from the ring buffer.
+    """
+
+    def __init__(self, buffer_size, max_buffers, queue_size):
+        self.buffer_size = buffer_size
+        self.max_buffers = max_buffers
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._buffers = OrderedDict()
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def publish(self, message):
+        # Called from request threads and the transport listener thread.
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(self._dispatch, message)
+        else:
+            self._dispatch(message)
+
+    def _dispatch(self, message):
+        # Dispatches scheduled on the loop can still overlap ones made before it was known
+        with self._lock:
+            event_id = message["event"]
+            buffer = self._buffers.get(event_id)
+            if buffer is None:
+                buffer = self._buffers[event_id] = deque(maxlen=self.buffer_size)
+                while len(self._buffers) > self.max_buffers:
+                    self._buffers.popitem(last=False)
+            else:
+                self._buffers.move_to_end(event_id)
+            buffer.append(message)
+
+            for subscriber in self._subscribers.get(event_id, ()):
+                if subscriber.overflowed:
+                    continue
+                try:
+                    subscriber.queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    subscriber.overflowed = True
+
+    def subscribe(self, event_id, last_event_id=None):
+        """
+        Register a subscriber and return it with the messages it missed.
+
+        The backlog is ``None`` when ``last_event_id`` has already left the ring
+        buffer, in which case the client has to refetch the event.
+        """
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.setdefault(event_id, set()).add(subscriber)
+            buffered = list(self._buffers.get(event_id, ()))
+
+        backlog = []
+        if last_event_id:
+            ids = [message["id"] for message in buffered]
+            backlog = buffered[ids.index(last_event_id) + 1:] if last_event_id in ids else None
+        return subscriber, backlog
+
+    def unsubscribe(self, event_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(event_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[event_id]
+
+
+class LocalTransport:
+    """Delivers to subscribers of this process only (development, single worker)."""
+
+    def send(self, message):
+        transaction.on_commit(lambda: hub.publish(message))
+
+    def start(self):
+        pass
+
+
+class PostgresTransport:
+    """Fans messages out to every process through Postgres LISTEN/NOTIFY."""
+
+    channel = "events_stream"
+
+    def __init__(self):
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        # NOTIFY is transactional, listeners only receive it once the write commits.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, json.dumps(message)])
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name="events-stream-listener", daemon=True)
+                self._thread.start()
+
+    def _connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        db = settings.DATABASES["default"]
+        params = {
+            "dbname": db.get("NAME"), "user": db.get("USER"), "password": db.get("PASSWORD"),
+            "host": db.get("HOST") or None, "port": db.get("PORT") or None,
+        }
+        conn = psycopg2.connect(**{key: value for key, value in params.items() if value})
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        return conn
+
+    def _listen(self):
+        import psycopg2
+
+        while True:
+            try:
+                conn = self._connect()
+                try:
+                    while True:
+                        if select.select([conn], [], [], 5) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            hub.publish(json.loads(conn.notifies.pop(0).payload))
+                finally:
+                    conn.close()
+            except psycopg2.Error:
+                logger.exception("Event stream listener lost its connection, reconnecting")
+                time.sleep(1)
+
+
+hub = ChangeHub(
+    buffer_size=_setting("EVENTS_STREAM_BUFFER_SIZE", 256),
+    max_buffers=_setting("EVENTS_STREAM_MAX_BUFFERS", 10000),
+    queue_size=_setting("EVENTS_STREAM_QUEUE_SIZE", 100),
+)
+
+_transport = None
+
+
+def get_transport():
+    global _transport
+    if _transport is None:
+        default = "postgres" if "postgresql" in settings.DATABASES["default"]["ENGINE"] else "local"
+        name = _setting("EVENTS_STREAM_TRANSPORT", default)
+        _transport = PostgresTransport() if name == "postgres" else LocalTransport()
+    return _transport
+
+
+def notify(kind, action, event_id, object_id, **extra):
+    get_transport().send({
+        "id": uuid.uuid4().hex,
+        "type": f"{kind}.{action}",
+        "event": event_id,
+        "object_id": object_id,
+        **extra,
+    })
+
+
+def _resolve_user(scope):
+    from django.contrib.auth.models import AnonymousUser
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken
+
+    # EventSource cannot set headers, so the token may also come as ?access_token=
+    raw = None
+    header = dict(scope["headers"]).get(b"authorization", b"").decode()
+    if header.startswith("Bearer "):
+        raw = header[len("Bearer "):]
+    else:
+        raw = parse_qs(scope.get("query_string", b"").decode()).get("access_token", [None])[0]
+    if not raw:
+        return AnonymousUser()
+
+    auth = JWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+@sync_to_async
+def _authorize(scope, event_id):
+    from .models import Event
+
+    try:
+        user = _resolve_user(scope)
+        if user is None:
+            return 401, "Given token not valid."
+        if not user.is_authenticated:
+            return 401, "Authentication credentials were not provided."
+        event = Event.objects.filter(pk=event_id).first()
+        if event is None:
+            return 404, "Not found."
+        # Messages name the user behind every RSVP and review, which only the organizer may see
+        if user.id != event.organizer_id:
+            return 403, "Only the organizer can follow this event's changes."
+        return 200, None
+    finally:
+        close_old_connections()
+
+
+def _format(message):
+    return f"id: {message['id']}\nevent: {message['type']}\ndata: {json.dumps(message)}\n\n".encode()
+
+
+async def _reject(send, status, detail):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json")],
+    })
+    await send({"type": "http.response.body", "body": json.dumps({"detail": detail}).encode()})
+
+
+async def stream_event(scope, receive, send, event_id):
+    status, detail = await _authorize(scope, event_id)
+    if status != 200:
+        await _reject(send, status, detail)
+        return
+
+    get_transport().start()
+    last_event_id = dict(scope["headers"]).get(b"last-event-id", b"").decode() or None
+    subscriber, backlog = hub.subscribe(event_id, last_event_id)
+
+    async def wait_for_disconnect():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    disconnect = asyncio.ensure_future(wait_for_disconnect())
+    heartbeat = _setting("EVENTS_STREAM_HEARTBEAT_SECONDS", 15)
+
+    async def write(body):
+        await send({"type": "http.response.body", "body": body, "more_body": True})
+
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        await write(f"retry: {_setting('EVENTS_STREAM_RETRY_MS', 3000)}\n\n".encode())
+        if backlog is None:
+            await write(b"event: reset\ndata: {}\n\n")
+        else:
+            for message in backlog:
+                await write(_format(message))
+
+        # A subscriber that fell behind is closed, it resumes via Last-Event-ID.
+        while not subscriber.overflowed:
+            getter = asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait(
+                {getter, disconnect}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter not in done:
+                getter.cancel()
+            if disconnect in done:
+                return
+            await write(_format(getter.result()) if getter in done else b": ping\n\n")
+
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        disconnect.cancel()
+        hub.unsubscribe(event_id, subscriber)
+
+
+def with_event_streams(application):
+    """Serve ``/api/events/<id>/stream/`` as Server-Sent Events, everything else via ``application``."""
+
+    async def router(scope, receive, send):
+        if scope["type"] == "http":
+            match = STREAM_PATH.match(scope["path"])
+            if match:
+                await stream_event(scope, receive, send, int(match.group("event_id")))
+                return
+        await application(scope, receive, send)
+
+    return router
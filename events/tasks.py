@@ -0,0 +1,36 @@
+from jobs.queue import task
+
+from .models import Event, Notification
+
+FAN_OUT_CHUNK = 1000
+
+
+@task(queue="notifications")
+def notify_invitees(event_id, verb):
+    """Split an event's invite list into chunks, each delivered by its own job."""
+    invitee_ids = list(
+        Event.invited.through.objects.filter(event_id=event_id).order_by("user_id").values_list("user_id", flat=True)
+    )
+    deliver_notifications.enqueue_many([
+        {"event_id": event_id, "user_ids": invitee_ids[start:start + FAN_OUT_CHUNK], "verb": verb}
+        for start in range(0, len(invitee_ids), FAN_OUT_CHUNK)
+    ])
+
+
+@task(queue="notifications")
+def deliver_notifications(event_id, user_ids, verb):
+    if not Event.objects.filter(pk=event_id).exists():
+        return
+    Notification.objects.bulk_create([Notification(event_id=event_id, user_id=user_id, verb=verb) for user_id in user_ids])
+
+
+def enqueue_invite_notifications(invites):
+    """Queue "invited" notifications for ``invites``, a mapping of event id to newly invited user ids."""
+    jobs = []
+    for event_id, user_ids in invites.items():
+        user_ids = sorted(user_ids)
+        jobs.extend(
+            {"event_id": event_id, "user_ids": user_ids[start:start + FAN_OUT_CHUNK], "verb": Notification.VERB_INVITED}
+            for start in range(0, len(user_ids), FAN_OUT_CHUNK)
+        )
+    deliver_notifications.enqueue_many(jobs)
@@ -1,3 +1,617 @@
-from django.test import TestCase
+import asyncio
+import math
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.core import signing
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from jobs.models import Job
+from jobs.queue import Worker
+
+from .admin import EstimatedCountPaginator
+from .archive import archive_batch, archive_events
+from .models import ArchivedEvent, Event, EventRatingStats, EventTrendScore, Notification, RSVP, Review
+from .ratings import rebuild_rating_stats
+from .schedule import mark_overlaps
+from .stream import ChangeHub, _authorize
+from .sync import WATERMARK_SALT
+from .trending import log_activity, record_activity, refresh_trending
+
+
+def make_event(organizer, title="Event", start=None, hours=2, **kwargs):
+    start = start or timezone.now() + timedelta(days=1)
+    return Event.objects.create(
+        title=title, organizer=organizer, start_time=start, end_time=start + timedelta(hours=hours), **kwargs
+    )
+
+
+@override_settings(EVENTS_SYNC_WATERMARK_LAG_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=None, limit=None):
+        params = {}
+        if since:
+            params["since"] = since
+        if limit:
+            params["limit"] = limit
+        response = self.client.get("/api/events/sync/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def sync_all(self, since=None, limit=None):
+        pages = []
+        for _ in range(20):
+            page = self.sync(since, limit)
+            pages.append(page)
+            since = page["watermark"]
+            if not page["has_more"]:
+                return pages
+        self.fail("sync did not finish paging")
+
+    def test_pages_through_rows_sharing_one_timestamp(self):
+        event = make_event(self.user)
+        reviewers = [User.objects.create_user(f"reviewer{i}") for i in range(5)]
+        Review.objects.bulk_create([Review(event=event, user=user, rating=4) for user in reviewers])
+        Review.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+
+        pages = self.sync_all(limit=2)
+
+        seen = [review["id"] for page in pages for review in page["reviews"]]
+        self.assertEqual(sorted(seen), sorted(Review.objects.values_list("id", flat=True)))
+        self.assertEqual(len(seen), 5)
+
+    def test_incremental_sync_returns_only_changes(self):
+        old = make_event(self.user, "Old")
+        Event.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+        watermark = self.sync_all()[-1]["watermark"]
+
+        new = make_event(self.user, "New")
+        page = self.sync(watermark)
+
+        self.assertEqual([event["id"] for event in page["events"]], [new.pk])
+
+    def test_deletions_are_reported_as_tombstones(self):
+        event = make_event(self.user)
+        other = make_event(self.user, "Other")
+        rsvp = RSVP.objects.create(event=other, user=self.user, status=RSVP.STATUS_GOING)
+        Review.objects.create(event=event, user=self.user, rating=5)
+        watermark = self.sync_all()[-1]["watermark"]
+        event_id, rsvp_id = event.pk, rsvp.pk
+
+        rsvp.delete()
+        event.delete()
+        page = self.sync(watermark)
+
+        self.assertEqual(page["deleted"]["events"], [event_id])
+        self.assertEqual(page["deleted"]["rsvps"], [rsvp_id])
+        # Reviews of a deleted event are implied by its tombstone
+        self.assertEqual(page["deleted"]["reviews"], [])
+
+    def test_private_events_of_others_are_not_synced(self):
+        owner = User.objects.create_user("bob")
+        make_event(owner, "Hidden", is_public=False)
+        invited = make_event(owner, "Invited", is_public=False)
+        invited.invited.add(self.user)
+
+        titles = [event["title"] for page in self.sync_all() for event in page["events"]]
+
+        self.assertEqual(titles, ["Invited"])
+
+    def deleted_events_since(self, change):
+        watermark = self.sync_all()[-1]["watermark"]
+        change()
+        return self.sync(watermark)["deleted"]["events"]
+
+    def test_uninvited_users_are_told_to_drop_the_event(self):
+        owner = User.objects.create_user("bob")
+        event = make_event(owner, is_public=False)
+        event.invited.add(self.user)
+
+        self.assertEqual(self.deleted_events_since(lambda: event.invited.remove(self.user)), [event.pk])
+
+    def test_cleared_invites_from_either_side_are_reported(self):
+        owner = User.objects.create_user("bob")
+        first = make_event(owner, "First", is_public=False)
+        second = make_event(owner, "Second", is_public=False)
+        first.invited.add(self.user)
+        second.invited.add(self.user)
+
+        self.assertEqual(self.deleted_events_since(first.invited.clear), [first.pk])
+        self.assertEqual(self.deleted_events_since(self.user.invited_events.clear), [second.pk])
+
+    def test_event_made_private_is_dropped_by_those_who_lost_access(self):
+        owner = User.objects.create_user("bob")
+        event = make_event(owner)
+        guest = User.objects.create_user("guest")
+        event.invited.add(guest)
+
+        watermark = self.sync_all()[-1]["watermark"]
+        self.client.force_authenticate(guest)
+        guest_watermark = self.sync_all()[-1]["watermark"]
+
+        event.is_public = False
+        event.save()
+
+        self.assertEqual(self.sync(guest_watermark)["deleted"]["events"], [])
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.sync(watermark)["deleted"]["events"], [event.pk])
+
+    def test_deleted_private_events_are_only_reported_to_their_audience(self):
+        owner = User.objects.create_user("bob")
+        hidden = make_event(owner, "Hidden", is_public=False)
+        invited = make_event(owner, "Invited", is_public=False)
+        invited.invited.add(self.user)
+        invited_id = invited.pk
+
+        def delete_both():
+            hidden.delete()
+            invited.delete()
+
+        self.assertEqual(self.deleted_events_since(delete_both), [invited_id])
+
+    def test_expired_watermark_requires_resync(self):
+        token = signing.dumps((timezone.now() - timedelta(days=365)).isoformat(), salt=WATERMARK_SALT)
+
+        response = self.client.get("/api/events/sync/", {"since": token})
+
+        self.assertEqual(response.status_code, 410)
+
+    def test_tampered_watermark_is_rejected(self):
+        response = self.client.get("/api/events/sync/", {"since": "not-a-watermark"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class StreamAuthorizationTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer")
+        self.event = make_event(self.organizer)
+
+    def authorize(self, user=None):
+        headers = [(b"authorization", f"Bearer {AccessToken.for_user(user)}".encode())] if user else []
+        return async_to_sync(_authorize)({"headers": headers, "query_string": b""}, self.event.pk)[0]
+
+    def test_organizer_may_stream(self):
+        self.assertEqual(self.authorize(self.organizer), 200)
+
+    def test_anonymous_clients_are_rejected_even_for_public_events(self):
+        self.assertEqual(self.authorize(), 401)
+
+    def test_other_users_are_rejected(self):
+        guest = User.objects.create_user("guest")
+        self.event.invited.add(guest)
+
+        self.assertEqual(self.authorize(guest), 403)
+
+
+def message(event_id, number):
+    return {"id": f"m{number}", "type": "rsvp.created", "event": event_id, "object_id": number}
+
+
+class ChangeHubTests(SimpleTestCase):
+    def hub(self, buffer_size=3, max_buffers=10, queue_size=10):
+        return ChangeHub(buffer_size=buffer_size, max_buffers=max_buffers, queue_size=queue_size)
+
+    def subscribe(self, hub, event_id, last_event_id=None):
+        async def subscribe():
+            return hub.subscribe(event_id, last_event_id)
+
+        return async_to_sync(subscribe)()
+
+    def test_reconnect_replays_messages_after_last_event_id(self):
+        hub = self.hub()
+        for number in range(1, 4):
+            hub.publish(message(1, number))
+
+        _, backlog = self.subscribe(hub, 1, "m1")
+
+        self.assertEqual([item["id"] for item in backlog], ["m2", "m3"])
+
+    def test_reconnect_past_the_ring_buffer_gets_a_reset(self):
+        hub = self.hub(buffer_size=2)
+        for number in range(1, 4):
+            hub.publish(message(1, number))
+
+        self.assertIsNone(self.subscribe(hub, 1, "m1")[1])
+        self.assertEqual(self.subscribe(hub, 1)[1], [])
+
+    def test_least_recently_active_buffers_are_evicted(self):
+        hub = self.hub(max_buffers=2)
+        for event_id in (1, 2, 3):
+            hub.publish(message(event_id, event_id))
+
+        self.assertIsNone(self.subscribe(hub, 1, "m1")[1])
+        self.assertEqual(self.subscribe(hub, 3, "m3")[1], [])
+
+    def test_messages_fan_out_to_subscribers_of_their_event(self):
+        hub = self.hub()
+
+        async def scenario():
+            first, _ = hub.subscribe(1)
+            second, _ = hub.subscribe(1)
+            other, _ = hub.subscribe(2)
+            hub.publish(message(1, 1))
+            await asyncio.sleep(0)
+            hub.unsubscribe(1, second)
+            hub.publish(message(1, 2))
+            await asyncio.sleep(0)
+            return [[queue.get_nowait()["id"] for _ in range(queue.qsize())] for queue in (first.queue, second.queue, other.queue)]
+
+        self.assertEqual(async_to_sync(scenario)(), [["m1", "m2"], ["m1"], []])
+
+    def test_subscriber_that_falls_behind_is_cut_off(self):
+        hub = self.hub(queue_size=2)
+
+        async def scenario():
+            slow, _ = hub.subscribe(1)
+            for number in range(1, 4):
+                hub.publish(message(1, number))
+            await asyncio.sleep(0)
+            return slow
+
+        slow = async_to_sync(scenario)()
+
+        self.assertTrue(slow.overflowed)
+        self.assertEqual(slow.queue.qsize(), 2)
+
+
+class RatingStatsTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer")
+        self.reviewers = [User.objects.create_user(f"reviewer{i}") for i in range(3)]
+        self.event = make_event(self.organizer)
+
+    def stats(self, event=None):
+        return EventRatingStats.objects.get(event=event or self.event)
+
+    def assertStats(self, count, total, histogram, event=None):
+        stats = self.stats(event)
+        self.assertEqual((stats.count, stats.total), (count, total))
+        self.assertEqual(stats.histogram, {str(star): histogram.get(star, 0) for star in range(1, 6)})
+        # Default prior: mean 3.0 weighted as 5 reviews
+        self.assertAlmostEqual(stats.bayesian_score, (15 + total) / (5 + count))
+
+    def test_reviews_keep_stats_up_to_date(self):
+        self.assertStats(0, 0, {})
+
+        first = Review.objects.create(event=self.event, user=self.reviewers[0], rating=5)
+        second = Review.objects.create(event=self.event, user=self.reviewers[1], rating=3)
+        self.assertStats(2, 8, {5: 1, 3: 1})
+        self.assertEqual(self.stats().mean, 4)
+
+        second.rating = 1
+        second.save()
+        self.assertStats(2, 6, {5: 1, 1: 1})
+
+        first.comment = "Still great"
+        first.save()
+        self.assertStats(2, 6, {5: 1, 1: 1})
+
+        first.delete()
+        self.assertStats(1, 1, {1: 1})
+
+    def test_missing_stats_row_is_rebuilt_from_reviews(self):
+        Review.objects.create(event=self.event, user=self.reviewers[0], rating=4)
+        EventRatingStats.objects.filter(event=self.event).delete()
+
+        Review.objects.create(event=self.event, user=self.reviewers[1], rating=2)
+
+        self.assertStats(2, 6, {4: 1, 2: 1})
+
+    @override_settings(EVENTS_RATING_PRIOR_MEAN=4.0, EVENTS_RATING_PRIOR_WEIGHT=2)
+    def test_rebuild_applies_a_changed_prior(self):
+        Review.objects.create(event=self.event, user=self.reviewers[0], rating=1)
+
+        self.assertEqual(rebuild_rating_stats(), 1)
+
+        self.assertAlmostEqual(self.stats().bayesian_score, (2 * 4.0 + 1) / 3)
+
+    def test_stats_endpoint_respects_event_visibility(self):
+        private = make_event(self.organizer, "Private", is_public=False)
+        private.invited.add(self.reviewers[0])
+        Review.objects.create(event=private, user=self.reviewers[0], rating=5)
+        url = f"/api/events/{private.pk}/reviews/stats/"
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.reviewers[0])
+        response = self.client.get(url)
+        self.assertEqual((response.status_code, response.data["count"]), (200, 1))
+        self.assertEqual(response.data["histogram"]["5"], 1)
+
+    def test_events_ordered_by_rating_score(self):
+        liked = make_event(self.organizer, "Liked")
+        disliked = make_event(self.organizer, "Disliked")
+        for reviewer in self.reviewers:
+            Review.objects.create(event=liked, user=reviewer, rating=5)
+            Review.objects.create(event=disliked, user=reviewer, rating=1)
+
+        response = self.client.get("/api/events/", {"ordering": "-rating_score", "include_ratings": "1"})
+
+        self.assertEqual([event["title"] for event in response.data["results"]], ["Liked", "Event", "Disliked"])
+        self.assertEqual(response.data["results"][0]["rating_stats"]["count"], 3)
+
+    def test_rating_ordering_is_ignored_outside_lists(self):
+        EventRatingStats.objects.filter(event=self.event).delete()
+
+        response = self.client.get(f"/api/events/{self.event.pk}/", {"ordering": "rating_score"})
+
+        self.assertEqual(response.status_code, 200)
+
+
+class NearbyTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer")
+        self.near = make_event(self.organizer, "Near", latitude=48.8566, longitude=2.3522)
+        self.far = make_event(self.organizer, "Far", latitude=51.5074, longitude=-0.1278)
+
+    def test_near_lists_events_within_radius_nearest_first(self):
+        response = self.client.get("/api/events/", {"near": "48.86,2.35", "radius_km": 500})
+
+        self.assertEqual([event["title"] for event in response.data["results"]], ["Near", "Far"])
+        self.assertLess(response.data["results"][0]["distance_km"], 1)
+
+    def test_distance_ordering_without_near_is_ignored(self):
+        response = self.client.get("/api/events/", {"ordering": "distance_km"})
+
+        self.assertEqual(response.status_code, 200)
+
+
+class ArchiveTests(TestCase):
+    def test_archived_events_keep_their_rows_and_coordinates(self):
+        organizer = User.objects.create_user("organizer")
+        guest = User.objects.create_user("guest")
+        old = make_event(organizer, "Old", start=timezone.now() - timedelta(days=800), latitude=48.8566, longitude=2.3522)
+        old.invited.add(guest)
+        RSVP.objects.create(event=old, user=guest, status=RSVP.STATUS_GOING)
+        recent = make_event(organizer, "Recent")
+
+        self.assertEqual(archive_events(batch_size=1), 1)
+
+        archived = ArchivedEvent.objects.get(pk=old.pk)
+        self.assertEqual((archived.latitude, archived.longitude, archived.geo_cell), (48.8566, 2.3522, old.geo_cell))
+        self.assertEqual(list(archived.invited.all()), [guest])
+        self.assertEqual(archived.rsvps.count(), 1)
+        self.assertEqual(list(Event.objects.values_list("pk", flat=True)), [recent.pk])
+
+        response = self.client.get(f"/api/events/{old.pk}/")
+        self.assertTrue(response.data["archived"])
+        self.assertEqual(response.data["latitude"], 48.8566)
+
+    def test_invites_are_copied_in_chunks(self):
+        organizer = User.objects.create_user("organizer")
+        guests = [User.objects.create_user(f"guest{i}") for i in range(5)]
+        old = make_event(organizer, "Old", start=timezone.now() - timedelta(days=800))
+        old.invited.add(*guests)
+
+        ArchivedInvite = ArchivedEvent.invited.through
+        with mock.patch.object(ArchivedInvite.objects, "bulk_create", wraps=ArchivedInvite.objects.bulk_create) as bulk_create:
+            archive_batch(timezone.now(), chunk_size=2)
+
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2, 1])
+        self.assertEqual(
+            sorted(ArchivedEvent.objects.get(pk=old.pk).invited.values_list("pk", flat=True)), [guest.pk for guest in guests]
+        )
+
+
+class InviteNotificationTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer")
+        self.guests = [User.objects.create_user(f"guest{i}") for i in range(3)]
+        self.event = make_event(self.organizer)
+
+    def deliver(self):
+        worker = Worker(["notifications"])
+        while worker.run_once():
+            pass
+        return sorted(Notification.objects.filter(verb=Notification.VERB_INVITED).values_list("user__username", flat=True))
+
+    def test_invites_are_fanned_out_as_jobs(self):
+        self.event.invited.add(*self.guests[:2])
+
+        self.assertTrue(Job.objects.filter(queue="notifications").exists())
+        self.assertEqual(self.deliver(), ["guest0", "guest1"])
+
+    def test_invites_added_from_the_user_side_are_notified(self):
+        other = make_event(self.organizer, "Other")
+
+        self.guests[0].invited_events.add(self.event, other)
+
+        self.assertEqual(self.deliver(), ["guest0", "guest0"])
+        self.assertEqual(
+            set(Notification.objects.values_list("event_id", flat=True)), {self.event.pk, other.pk}
+        )
+
+    def test_admin_mass_invite_notifies_only_new_invitees(self):
+        self.event.invited.add(self.guests[0])
+        self.deliver()
+        admin = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(admin)
+
+        self.client.post("/admin/events/event/", {
+            "action": "invite_users", "_selected_action": [self.event.pk], "usernames": "guest0, guest1, guest2",
+        })
+
+        self.assertEqual(self.event.invited.count(), 3)
+        self.assertEqual(self.deliver(), ["guest0", "guest1", "guest2"])
+
+
+class AdminTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer")
+        self.events = [make_event(self.organizer, f"Event {i}") for i in range(3)]
+
+    def fake_postgres(self, estimate):
+        connection = mock.MagicMock(vendor="postgresql")
+        connection.cursor.return_value.__enter__.return_value.fetchone.return_value = (estimate,)
+        return mock.patch("events.admin.connections", {"default": connection})
+
+    def test_paginator_uses_the_estimate_for_large_unfiltered_tables(self):
+        with self.fake_postgres(50000):
+            self.assertEqual(EstimatedCountPaginator(Event.objects.all(), 10).count, 50000)
+
+    def test_paginator_counts_small_or_filtered_tables_exactly(self):
+        with self.fake_postgres(50):
+            self.assertEqual(EstimatedCountPaginator(Event.objects.all(), 10).count, 3)
+        with self.fake_postgres(50000):
+            self.assertEqual(EstimatedCountPaginator(Event.objects.filter(title="Event 1"), 10).count, 1)
+        self.assertEqual(EstimatedCountPaginator(Event.objects.all(), 10).count, 3)
+
+    def test_status_action_updates_and_streams_changed_rsvps(self):
+        guest = User.objects.create_user("guest")
+        maybe = RSVP.objects.create(event=self.events[0], user=guest, status=RSVP.STATUS_MAYBE)
+        going = RSVP.objects.create(event=self.events[1], user=guest, status=RSVP.STATUS_GOING)
+        self.client.force_login(User.objects.create_superuser("admin", password="pw"))
+
+        with mock.patch("events.stream.notify") as notify:
+            self.client.post("/admin/events/rsvp/", {"action": "mark_going", "_selected_action": [maybe.pk, going.pk]})
+
+        self.assertEqual(set(RSVP.objects.values_list("status", flat=True)), {RSVP.STATUS_GOING})
+        notify.assert_called_once_with("rsvp", "updated", self.events[0].pk, maybe.pk, user=guest.pk, status=RSVP.STATUS_GOING)
+
+
+class ScheduleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice")
+        self.organizer = User.objects.create_user("bob")
+        self.start = timezone.now() + timedelta(days=1)
+
+    def event(self, title, offset_hours, hours, organizer=None, **kwargs):
+        return make_event(
+            organizer or self.organizer, title, start=self.start + timedelta(hours=offset_hours), hours=hours, **kwargs
+        )
+
+    def test_mark_overlaps(self):
+        long = self.event("Long", 0, 5)
+        inside = self.event("Inside", 1, 1)
+        after_inside = self.event("After inside", 2, 1)
+        later = self.event("Later", 5, 1)
+
+        mark_overlaps([later, after_inside, inside, long])
+
+        self.assertEqual(sorted(long.conflicts), [inside.pk, after_inside.pk])
+        self.assertEqual(inside.conflicts, [long.pk])
+        # Back-to-back events do not conflict
+        self.assertEqual(after_inside.conflicts, [long.pk])
+        self.assertEqual(later.conflicts, [])
+
+    def test_schedule_lists_commitments_with_conflicts(self):
+        organized = self.event("Mine", 0, 2, organizer=self.user)
+        going = self.event("Going", 1, 2)
+        not_going = self.event("Not going", 1, 2)
+        RSVP.objects.create(event=going, user=self.user, status=RSVP.STATUS_GOING)
+        RSVP.objects.create(event=not_going, user=self.user, status=RSVP.STATUS_NOT_GOING)
+        self.client.force_login(self.user)
+
+        entries = self.client.get("/api/events/schedule/").data["events"]
+
+        self.assertEqual(
+            [(entry["title"], entry["role"], entry["conflicts"]) for entry in entries],
+            [("Mine", "Organizer", [going.pk]), ("Going", "Going", [organized.pk])],
+        )
+
+    def test_rsvp_conflicts_are_only_shown_to_their_owner(self):
+        self.event("Secret", 0, 2, organizer=self.user, is_public=False)
+        event = self.event("Meetup", 1, 2)
+        url = f"/api/events/{event.pk}/rsvp/"
+
+        self.client.force_login(self.user)
+        response = self.client.post(f"{url}?include_conflicts=1", {"status": "Going"})
+        self.assertEqual([entry["title"] for entry in response.data["conflicts"]], ["Secret"])
+
+        self.client.force_login(self.organizer)
+        response = self.client.patch(
+            f"{url}{self.user.pk}/?include_conflicts=1", {"status": "Maybe"}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("conflicts", response.data)
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer")
+        self.fans = [User.objects.create_user(f"fan{i}") for i in range(3)]
+
+    def going(self, event, fans, hours_ago=0):
+        rsvps = [RSVP.objects.create(event=event, user=fan, status=RSVP.STATUS_GOING) for fan in fans]
+        if hours_ago:
+            RSVP.objects.filter(pk__in=[rsvp.pk for rsvp in rsvps]).update(
+                updated_at=timezone.now() - timedelta(hours=hours_ago)
+            )
+        return rsvps
+
+    def trending(self):
+        response = self.client.get("/api/events/", {"ordering": "trending"})
+        return [event["title"] for event in response.data["results"]]
+
+    def score(self, event):
+        return EventTrendScore.objects.get(event=event).score
+
+    def test_activity_adds_up_in_log_space(self):
+        event = make_event(self.organizer)
+        first, second = timezone.now() - timedelta(hours=30), timezone.now()
+
+        record_activity(event.pk, RSVP.STATUS_GOING, first)
+        record_activity(event.pk, "review", second)
+
+        a, b = log_activity(3.0, first), log_activity(2.0, second)
+        self.assertAlmostEqual(self.score(event), max(a, b) + math.log1p(math.exp(-abs(a - b))), places=6)
+
+    def test_concurrent_first_activity_falls_back_to_the_update(self):
+        event = make_event(self.organizer)
+        moment = timezone.now()
+        record_activity(event.pk, "review", moment)
+        real_update = QuerySet.update
+        calls = []
+
+        def update(queryset, **kwargs):
+            # The first UPDATE misses as if the row did not exist yet, the insert then collides
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", autospec=True, side_effect=update):
+            record_activity(event.pk, "review", moment)
+
+        self.assertEqual(len(calls), 2)
+        self.assertAlmostEqual(self.score(event), log_activity(2.0, moment) + math.log(2), places=6)
+
+    def test_recent_activity_outranks_older_activity(self):
+        older = make_event(self.organizer, "Older")
+        recent = make_event(self.organizer, "Recent")
+        make_event(self.organizer, "Quiet")
+        past = make_event(self.organizer, "Past", start=timezone.now() - timedelta(days=2))
+        # Two RSVPs two half-lives ago are worth half of one RSVP now
+        self.going(older, self.fans[:2], hours_ago=48)
+        self.going(recent, self.fans[:1])
+        self.going(past, self.fans)
+
+        refresh_trending()
+
+        self.assertEqual(self.trending(), ["Recent", "Older"])
+        self.assertAlmostEqual(self.score(recent) - self.score(older), math.log(2), places=3)
+
+    def test_refresh_drops_withdrawn_and_decayed_activity(self):
+        withdrawn = make_event(self.organizer, "Withdrawn")
+        stale = make_event(self.organizer, "Stale")
+        steady = make_event(self.organizer, "Steady")
+        (rsvp,) = self.going(withdrawn, self.fans[:1])
+        self.going(stale, self.fans[:1], hours_ago=24 * 30)
+        self.going(steady, self.fans[1:2])
+        rsvp.status = RSVP.STATUS_NOT_GOING
+        rsvp.save()
+        self.assertIn("Withdrawn", self.trending())
+
+        rescored, removed = refresh_trending()
+
+        self.assertEqual((rescored, removed), (1, 2))
+        self.assertEqual(self.trending(), ["Steady"])
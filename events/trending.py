@@ -0,0 +1,95 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from .models import EventTrendScore, Review, RSVP
+
+# Scores are stored as log(sum(weight * e^((t - EPOCH) / tau))) over an event's
+# activity. Every event decays at the same rate, so comparing stored values
+# ranks events by their decayed score at any moment, with no rewrites as time
+# passes. Working in log space keeps the values linear in time, so they cannot
+# overflow.
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+DEFAULT_WEIGHTS = {
+    RSVP.STATUS_GOING: 3.0,
+    RSVP.STATUS_MAYBE: 1.0,
+    "review": 2.0,
+}
+
+
+def activity_weight(kind):
+    return getattr(settings, "EVENTS_TRENDING_WEIGHTS", DEFAULT_WEIGHTS).get(kind, 0)
+
+
+def decay_constant():
+    """Seconds per e-fold, from the half-life."""
+    return getattr(settings, "EVENTS_TRENDING_HALF_LIFE_HOURS", 24) * 3600 / math.log(2)
+
+
+def log_activity(weight, moment):
+    return math.log(weight) + (moment - EPOCH).total_seconds() / decay_constant()
+
+
+def record_activity(event_id, kind, moment=None):
+    weight = activity_weight(kind)
+    if weight <= 0:
+        return
+    x = log_activity(weight, moment or timezone.now())
+    # log(e^score + e^x), computed without overflow
+    updated = EventTrendScore.objects.filter(event_id=event_id).update(
+        score=Greatest(F("score"), Value(x)) + Ln(Value(1.0) + Exp(-Abs(F("score") - Value(x)))),
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                EventTrendScore.objects.create(event_id=event_id, score=x)
+        except IntegrityError:
+            record_activity(event_id, kind, moment)
+
+
+def refresh_trending(window=None, batch_size=1000):
+    """
+    Recompute every score from the activity inside ``window`` and drop the rest.
+
+    Incremental updates only ever add, so RSVPs that were withdrawn or deleted
+    linger until this runs. Events with no recent activity are removed, which
+    keeps the index to what can actually trend.
+    """
+    window = window or timedelta(hours=7 * getattr(settings, "EVENTS_TRENDING_HALF_LIFE_HOURS", 24))
+    now = timezone.now()
+    since = now - window
+    # Sum relative to now so the exponents stay small
+    offset = (now - EPOCH).total_seconds() / decay_constant()
+
+    sums = defaultdict(float)
+
+    def add(event_id, kind, moment):
+        weight = activity_weight(kind)
+        if weight > 0:
+            sums[event_id] += math.exp(log_activity(weight, moment) - offset)
+
+    for event_id, status, moment in RSVP.objects.filter(updated_at__gte=since).values_list("event_id", "status", "updated_at").iterator():
+        add(event_id, status, moment)
+    for event_id, moment in Review.objects.filter(created_at__gte=since).values_list("event_id", "created_at").iterator():
+        add(event_id, "review", moment)
+
+    scores = [
+        EventTrendScore(event_id=event_id, score=math.log(total) + offset, updated_at=now)
+        for event_id, total in sums.items()
+    ]
+    with transaction.atomic():
+        EventTrendScore.objects.bulk_create(
+            scores, batch_size=batch_size, update_conflicts=True,
+            unique_fields=["event"], update_fields=["score", "updated_at"],
+        )
+        # Rows neither rescored here nor touched by activity since have decayed out
+        removed, _ = EventTrendScore.objects.filter(updated_at__lt=now).delete()
+    return len(scores), removed
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EventViewSet, CreateRSVPView, UpdateRSVPView, CreateReviewView, ListReviewView
+from .views import EventViewSet, CreateRSVPView, UpdateRSVPView, ReviewListCreateView, NotificationListView, ReviewStatsView, ScheduleView, SyncView
 
 router = DefaultRouter()
 router.register(r'', EventViewSet, basename='event')
@@ -8,6 +8,11 @@ router.register(r'', EventViewSet, basename='event')
 app_name = "events"
 
 urlpatterns = [
+    # These must precede the router, whose detail route would otherwise capture them
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('notifications/', NotificationListView.as_view(), name='notification-list'),
+    path('schedule/', ScheduleView.as_view(), name='schedule'),
+
     path('', include(router.urls)),
     
     # RSVP
@@ -15,6 +20,6 @@ urlpatterns = [
     path('<int:event_id>/rsvp/<int:user_id>/', UpdateRSVPView.as_view(), name='rsvp-update'),   
     
       # Reviews
-    path('<int:event_id>/reviews/', CreateReviewView.as_view(), name='review-create'),          
-    path('<int:event_id>/reviews/', ListReviewView.as_view(), name='review-list'),            
+    path('<int:event_id>/reviews/', ReviewListCreateView.as_view(), name='review-list'),
+    path('<int:event_id>/reviews/stats/', ReviewStatsView.as_view(), name='review-stats'),
 ]
\ No newline at end of file
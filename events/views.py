@@ -1,15 +1,51 @@
+from datetime import timedelta
+
+from django.core import signing
+from django.db.models import BooleanField, F, Value
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import generics, permissions, status, filters
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import Event, RSVP, Review
-from .serializers import EventSerializer, RSVPSerializer, ReviewSerializer
-from .permissions import IsOrganizerOrReadOnly, IsEventPublicOrInvited
+from .cache import batch_cached
+from .models import ArchivedEvent, Event, EventRatingStats, Notification, RSVP, Review
+from .serializers import (
+    ArchivedEventSerializer, EventSerializer, NotificationSerializer, RatingStatsSerializer, RSVPSerializer,
+    ReviewSerializer, ScheduleEntrySerializer, wants_rating_stats,
+)
+from .geo import within_radius
+from .permissions import IsOrganizerOrReadOnly, IsEventPublicOrInvited, is_invited
+from .ratings import bayesian_score
+from .schedule import COMMITTED_STATUSES, commitments, conflicts_with, mark_overlaps
+from .sync import WatermarkExpired, collect_changes, decode_watermark, encode_watermark
+
+def get_event(event_id):
+    # Within a batch request the lookup is shared by all sub-requests
+    event = batch_cached(
+        ("event", int(event_id)),
+        lambda: Event.objects.select_related('organizer').filter(pk=event_id).first(),
+    )
+    if event is None:
+        raise Http404
+    return event
+
+def with_conflicts(request, rsvp, data):
+    # Opt-in with ?include_conflicts=1: the caller's other commitments overlapping this event.
+    # An organizer editing someone else's RSVP must not see that user's schedule.
+    if request.query_params.get('include_conflicts') not in ('1', 'true') or rsvp.user_id != request.user.id:
+        return data
+    conflicts = []
+    if rsvp.status in COMMITTED_STATUSES:
+        conflicts = conflicts_with(request.user, rsvp.event)
+    return {**data, "conflicts": ScheduleEntrySerializer(conflicts, many=True, context={"request": request}).data}
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
@@ -22,7 +58,9 @@ class EventViewSet(ModelViewSet):
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description', 'location', 'organizer__username']
-    ordering_fields = ['start_time', 'created_at']
+    ordering_fields = ['start_time', 'created_at', 'rating_score']
+    default_radius_km = 10
+    max_radius_km = 500
     
     def get_permissions(self):
         if self.action == 'create':
@@ -40,14 +78,89 @@ class EventViewSet(ModelViewSet):
             qs = Event.objects.filter(is_public=True)
         else:
             qs = Event.objects.all()
+
+        ordering = [term.strip().lstrip('-') for term in self.request.query_params.get('ordering', '').split(',')]
+        if 'rating_score' in ordering:
+            # OrderingFilter runs on detail requests too, which must still find events without stats
+            qs = qs.annotate(rating_score=F('rating_stats__bayesian_score'))
+            if self.action == 'list':
+                # Inner join so the planner can walk the bayesian_score index
+                qs = qs.filter(rating_stats__isnull=False)
+        if wants_rating_stats(self.request):
+            qs = qs.select_related('rating_stats')
+
+        if self.action == 'list' and self.request.query_params.get('ordering') == 'trending':
+            # Walks the score index from the top; events never active have no row
+            return qs.filter(trend_score__isnull=False, end_time__gte=timezone.now()).order_by('-trend_score__score', 'id')
+
+        if self.action == 'list' and 'near' in self.request.query_params:
+            latitude, longitude, radius_km = self.get_near_params()
+            return within_radius(qs, latitude, longitude, radius_km).order_by('distance_km', '-start_time')
         
         return qs.order_by('-start_time')
+
+    def get_near_params(self):
+        params = self.request.query_params
+        try:
+            latitude, longitude = (float(part) for part in params['near'].split(','))
+            radius_km = float(params.get('radius_km', self.default_radius_km))
+        except ValueError:
+            raise ValidationError({"near": "Use near=<latitude>,<longitude>&radius_km=<km>."})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({"near": "Coordinates are out of range."})
+        if not 0 < radius_km <= self.max_radius_km:
+            raise ValidationError({"radius_km": f"radius_km must be between 0 and {self.max_radius_km}."})
+        return latitude, longitude, radius_km
     
     def perform_create(self, serializer):
         serializer.save(organizer=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('include_archived') not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+
+        # Page over the (id, sort key) union of both tables, then load only that page's rows
+        search = filters.SearchFilter()
+        keys = ('id', 'start_time', 'created_at', 'archived')
+        hot = search.filter_queryset(request, Event.objects.filter(is_public=True), self)
+        cold = search.filter_queryset(request, ArchivedEvent.objects.filter(is_public=True), self)
+        ordering = request.query_params.get('ordering', '-start_time')
+        if ordering.lstrip('-') not in ('start_time', 'created_at'):
+            ordering = '-start_time'
+        merged = hot.order_by().annotate(archived=Value(False, output_field=BooleanField())).values_list(*keys).union(
+            cold.order_by().annotate(archived=Value(True, output_field=BooleanField())).values_list(*keys),
+            all=True,
+        ).order_by(ordering, '-id')
+
+        page = self.paginate_queryset(merged)
+        hot_rows = Event.objects.select_related('organizer').prefetch_related('invited')
+        if wants_rating_stats(request):
+            hot_rows = hot_rows.select_related('rating_stats')
+        hot_rows = hot_rows.in_bulk([row[0] for row in page if not row[3]])
+        cold_rows = ArchivedEvent.objects.select_related('organizer').prefetch_related('invited').in_bulk(
+            [row[0] for row in page if row[3]]
+        )
+
+        data = []
+        for pk, _, _, archived in page:
+            if archived and pk in cold_rows:
+                data.append(ArchivedEventSerializer(cold_rows[pk], context=self.get_serializer_context()).data)
+            elif not archived and pk in hot_rows:
+                data.append(self.get_serializer(hot_rows[pk]).data)
+        return self.get_paginated_response(data)
+
+    def get_archived_object(self):
+        pk = str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+        instance = ArchivedEvent.objects.select_related('organizer').filter(pk=pk).first() if pk.isdigit() else None
+        if instance is None:
+            raise Http404
+        return instance
     
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
+        try:
+            instance = self.get_object()
+        except Http404:
+            instance = self.get_archived_object()
         
         if not instance.is_public:
             if not request.user.is_authenticated:
@@ -55,23 +168,26 @@ class EventViewSet(ModelViewSet):
                     {"detail": "Authentication credentials were not provided."},
                     status=status.HTTP_401_UNAUTHORIZED
                 )
-            if request.user != instance.organizer and not instance.invited.filter(id=request.user.id).exists():
+            if request.user != instance.organizer and not is_invited(instance, request.user):
                 return Response(
                     {"detail": "You do not have permission to access this event."},
                     status=status.HTTP_403_FORBIDDEN
                 )
         
-        serializer = self.get_serializer(instance)
+        if isinstance(instance, ArchivedEvent):
+            serializer = ArchivedEventSerializer(instance, context=self.get_serializer_context())
+        else:
+            serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
 class CreateRSVPView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, event_id):
-        event = get_object_or_404(Event, pk=event_id)
+        event = get_event(event_id)
         
         if not event.is_public:
-            if request.user != event.organizer and not event.invited.filter(id=request.user.id).exists():
+            if request.user != event.organizer and not is_invited(event, request.user):
                 return Response(
                     {"detail": "You are not invited to this private event."},
                     status=status.HTTP_403_FORBIDDEN
@@ -82,8 +198,8 @@ class CreateRSVPView(APIView):
         
         serializer = RSVPSerializer(data=data, context={"request": request})
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            rsvp = serializer.save()
+            return Response(with_conflicts(request, rsvp, serializer.data), status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class UpdateRSVPView(APIView):
@@ -101,15 +217,31 @@ class UpdateRSVPView(APIView):
         
         serializer = RSVPSerializer(rsvp, data=request.data, partial=True, context={"request": request})
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+            rsvp = serializer.save()
+            return Response(with_conflicts(request, rsvp, serializer.data))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class CreateReviewView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+class ReviewListCreateView(generics.ListAPIView):
+    # GET and POST share one route, so a single view has to serve both
+    serializer_class = ReviewSerializer
+    pagination_class = StandardResultsSetPagination
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get_queryset(self):
+        event_id = self.kwargs.get("event_id")
+        return Review.objects.filter(event_id=event_id).order_by('-created_at')
+
+    def list(self, request, event_id):
+        event = get_event(event_id)
+        if not IsEventPublicOrInvited().has_object_permission(request, self, event):
+            return Response(
+                {"detail": "You do not have permission to access this event."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return super().list(request, event_id)
 
     def post(self, request, event_id):
-        event = get_object_or_404(Event, pk=event_id)
+        event = get_event(event_id)
         
         data = request.data.copy()
         data['event'] = event.id
@@ -120,10 +252,94 @@ class CreateReviewView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class ListReviewView(generics.ListAPIView):
-    serializer_class = ReviewSerializer
+class ReviewStatsView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, event_id):
+        event = get_event(event_id)
+        if not IsEventPublicOrInvited().has_object_permission(request, self, event):
+            return Response(
+                {"detail": "You do not have permission to access this event."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        stats = EventRatingStats.objects.filter(event=event).first() or EventRatingStats(event=event, bayesian_score=bayesian_score(0, 0))
+        return Response(RatingStatsSerializer(stats).data)
+
+class SyncView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 500
+    max_limit = 1000
+
+    def get(self, request):
+        since = None
+        token = request.query_params.get("since")
+        if token:
+            try:
+                since = decode_watermark(token)
+            except WatermarkExpired:
+                return Response(
+                    {"detail": "Watermark has expired, a full resync is required."},
+                    status=status.HTTP_410_GONE
+                )
+            except (signing.BadSignature, ValueError):
+                return Response({"detail": "Invalid watermark."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(int(request.query_params.get("limit", self.default_limit)), self.max_limit)
+        except ValueError:
+            return Response({"limit": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"limit": "limit must be positive."}, status=status.HTTP_400_BAD_REQUEST)
+
+        changes = collect_changes(request.user, since, limit)
+        context = {"request": request}
+        return Response({
+            "watermark": encode_watermark(changes["watermark"]),
+            "has_more": changes["has_more"],
+            "events": EventSerializer(changes["events"], many=True, context=context).data,
+            "rsvps": RSVPSerializer(changes["rsvps"], many=True, context=context).data,
+            "reviews": ReviewSerializer(changes["reviews"], many=True, context=context).data,
+            "deleted": changes["deleted"],
+        })
+
+
+class NotificationListView(generics.ListAPIView):
+    serializer_class = NotificationSerializer
     pagination_class = StandardResultsSetPagination
+    permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        event_id = self.kwargs.get("event_id")
-        return Review.objects.filter(event_id=event_id).order_by('-created_at')
\ No newline at end of file
+        return Notification.objects.filter(user=self.request.user).select_related("event").order_by("-created_at")
+
+
+class ScheduleView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    default_window = timedelta(days=30)
+    max_window = timedelta(days=366)
+
+    def get(self, request):
+        try:
+            start = self.parse_moment(request.query_params.get("start")) or timezone.now()
+            end = self.parse_moment(request.query_params.get("end")) or start + self.default_window
+        except ValueError:
+            return Response({"detail": "start and end must be ISO 8601 datetimes."}, status=status.HTTP_400_BAD_REQUEST)
+        if end <= start or end - start > self.max_window:
+            return Response(
+                {"detail": f"end must be after start and at most {self.max_window.days} days later."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        entries = mark_overlaps(commitments(request.user, start, end))
+        return Response({
+            "start": start,
+            "end": end,
+            "events": ScheduleEntrySerializer(entries, many=True, context={"request": request}).data,
+        })
+
+    def parse_moment(self, value):
+        if not value:
+            return None
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(value)
+        return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
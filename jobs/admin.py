@@ -0,0 +1,15 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("task", "queue", "status", "attempts", "run_at", "created_at")
+    list_filter = ("status", "queue")
+    search_fields = ("task", "last_error")
+    actions = ("requeue",)
+
+    @admin.action(description="Requeue selected jobs")
+    def requeue(self, request, queryset):
+        updated = queryset.update(status=Job.STATUS_QUEUED, attempts=0, run_at=timezone.now(), locked_at=None, locked_by="")
+        self.message_user(request, f"Requeued {updated} jobs.")
@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import Metrics, Worker, queue_stats
+
+
+class Command(BaseCommand):
+    help = "Run background job workers against the database-backed queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queue", action="append", dest="queues", help="Queue to consume, repeatable (default: all of default, notifications).")
+        parser.add_argument("--threads", type=int, default=4, help="Worker threads per process.")
+        parser.add_argument("--processes", type=int, default=1, help="Worker processes, each running --threads threads.")
+        parser.add_argument("--batch-size", type=int, default=10, help="Jobs claimed per poll.")
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument("--lock-timeout", type=int, default=300, help="Seconds before a running job is presumed abandoned.")
+        parser.add_argument("--stats-interval", type=float, default=30.0)
+        parser.add_argument("--burst", action="store_true", help="Exit once the queues are empty.")
+
+    def handle(self, *args, **options):
+        options["queues"] = options["queues"] or ["default", "notifications"]
+        if options["processes"] <= 1:
+            self.run_process(options)
+            return
+
+        # Children are forked so they inherit the configured Django; they must not share its connections
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = [context.Process(target=self.run_process, args=(options,)) for _ in range(options["processes"])]
+        for child in children:
+            child.start()
+
+        # Pass shutdown on so the children finish their current jobs instead of being orphaned
+        def forward(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    os.kill(child.pid, signum)
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, forward)
+        for child in children:
+            child.join()
+
+    def run_process(self, options):
+        stop = threading.Event()
+        metrics = Metrics()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        workers = [
+            Worker(
+                options["queues"], batch_size=options["batch_size"], poll_interval=options["poll_interval"],
+                lock_timeout=options["lock_timeout"], metrics=metrics, stop=stop,
+            )
+            for _ in range(options["threads"])
+        ]
+        threads = [threading.Thread(target=worker.run, kwargs={"burst": options["burst"]}, daemon=True) for worker in workers]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"[{os.getpid()}] {len(threads)} workers on {', '.join(options['queues'])}")
+
+        next_report = time.monotonic() + options["stats_interval"]
+        while any(thread.is_alive() for thread in threads):
+            stop.wait(0.5)
+            if time.monotonic() >= next_report:
+                self.report(metrics, options["queues"])
+                next_report += options["stats_interval"]
+        self.report(metrics, options["queues"])
+
+    def report(self, metrics, queues):
+        counts = queue_stats(queues)
+        self.stdout.write(
+            f"[{os.getpid()}] {metrics.snapshot()}; "
+            f"queued {counts['queued']['count']}, running {counts['running']['count']}, dead {counts['dead']['count']}"
+        )
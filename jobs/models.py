@@ -0,0 +1,35 @@
+from django.db import models
+from django.utils import timezone
+
+class Job(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DEAD = 'dead'
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DEAD, 'Dead'),
+    ]
+
+    queue = models.CharField(max_length=50, default='default')
+    task = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        indexes = [
+            # Serves the worker's "next ready job in this queue" claim
+            models.Index(fields=['queue', 'status', 'run_at'], name='jobs_job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.queue}] ({self.status})"
@@ -0,0 +1,203 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(task, *, queue="default", run_at=None, max_attempts=None, **kwargs):
+    """
+    Queue ``task`` (a function or its dotted path) to run with JSON-serializable ``kwargs``.
+
+    The row is written in the caller's transaction, so workers only see it once
+    that commits and never for a write that rolls back.
+    """
+    return Job.objects.create(**_job_fields(task, queue, run_at, max_attempts, kwargs))
+
+
+def enqueue_many(task, kwargs_list, *, queue="default", run_at=None, max_attempts=None, batch_size=1000):
+    return Job.objects.bulk_create(
+        [Job(**_job_fields(task, queue, run_at, max_attempts, kwargs)) for kwargs in kwargs_list],
+        batch_size=batch_size,
+    )
+
+
+def _job_fields(task, queue, run_at, max_attempts, kwargs):
+    path = task if isinstance(task, str) else f"{task.__module__}.{task.__name__}"
+    return {
+        "task": path,
+        "queue": queue,
+        "kwargs": kwargs,
+        "run_at": run_at or timezone.now(),
+        "max_attempts": max_attempts or _setting("JOBS_MAX_ATTEMPTS", 5),
+    }
+
+
+def task(queue="default", max_attempts=None):
+    """Decorator adding ``.enqueue(**kwargs)`` and ``.enqueue_many(kwargs_list)`` to a function."""
+
+    def decorator(func):
+        func.enqueue = lambda **kwargs: enqueue(func, queue=queue, max_attempts=max_attempts, **kwargs)
+        func.enqueue_many = lambda kwargs_list: enqueue_many(func, kwargs_list, queue=queue, max_attempts=max_attempts)
+        return func
+
+    return decorator
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at ``JOBS_MAX_BACKOFF_SECONDS``."""
+    base = _setting("JOBS_BACKOFF_SECONDS", 5)
+    delay = min(base * 2 ** (attempts - 1), _setting("JOBS_MAX_BACKOFF_SECONDS", 3600))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def queue_stats(queues=None):
+    qs = Job.objects.all() if not queues else Job.objects.filter(queue__in=queues)
+    stats = {row["status"]: row for row in qs.order_by().values("status").annotate(count=Count("id"), oldest=Min("run_at"))}
+    return {
+        status: {"count": stats.get(status, {}).get("count", 0), "oldest": stats.get(status, {}).get("oldest")}
+        for status, _ in Job.STATUS_CHOICES
+    }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.succeeded = self.retried = self.dead = 0
+        self.run_seconds = 0.0
+        self.started = time.monotonic()
+
+    def record(self, outcome, seconds):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.run_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            finished = self.succeeded + self.retried + self.dead
+            line = (
+                f"{finished / elapsed if elapsed else 0:.1f} jobs/s, {self.succeeded} ok, {self.retried} retried, "
+                f"{self.dead} dead-lettered, {self.run_seconds / finished * 1000 if finished else 0:.1f} ms avg"
+            )
+            self.reset()
+            return line
+
+
+class Worker:
+    """
+    Claims ready jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` and runs them.
+
+    Any number of workers, in threads, processes or on other hosts, can poll
+    the same queues; skipped locks keep them from blocking on each other.
+    Finished jobs are deleted, failed ones are retried with backoff until
+    ``max_attempts`` and then kept as ``dead`` for inspection. Jobs left
+    ``running`` by a crashed worker are requeued after ``lock_timeout``, or
+    dead-lettered if that was their last attempt.
+    """
+
+    def __init__(self, queues, batch_size=10, poll_interval=1.0, lock_timeout=300, metrics=None, stop=None):
+        self.queues = queues
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lock_timeout = timedelta(seconds=lock_timeout)
+        self.metrics = metrics or Metrics()
+        self.stop = stop or threading.Event()
+        self.name = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def claim(self):
+        now = timezone.now()
+        with transaction.atomic():
+            jobs = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(queue__in=self.queues, status=Job.STATUS_QUEUED, run_at__lte=now)
+                .order_by("run_at", "id")[:self.batch_size]
+            )
+            if jobs:
+                Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                    status=Job.STATUS_RUNNING, locked_at=now, locked_by=self.name, attempts=F("attempts") + 1,
+                )
+        for job in jobs:
+            job.attempts += 1
+        return jobs
+
+    def release_stale(self):
+        stale = Job.objects.filter(
+            queue__in=self.queues, status=Job.STATUS_RUNNING, locked_at__lt=timezone.now() - self.lock_timeout,
+        )
+        # A job that kills its worker (OOM, segfault) never reaches execute()'s retry accounting
+        dead = stale.filter(attempts__gte=F("max_attempts")).update(
+            status=Job.STATUS_DEAD, locked_at=None, last_error="Abandoned by its worker on the final attempt.",
+        )
+        if dead:
+            logger.error("Dead-lettered %s jobs abandoned on their final attempt", dead)
+        return stale.update(status=Job.STATUS_QUEUED, locked_at=None, locked_by="")
+
+    def execute(self, job):
+        started = time.monotonic()
+        try:
+            import_string(job.task)(**job.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+            if job.attempts >= job.max_attempts:
+                Job.objects.filter(pk=job.pk).update(status=Job.STATUS_DEAD, last_error=error, locked_at=None)
+                logger.error("Job %s (%s) dead-lettered after %s attempts", job.pk, job.task, job.attempts)
+                outcome = "dead"
+            else:
+                Job.objects.filter(pk=job.pk).update(
+                    status=Job.STATUS_QUEUED, last_error=error, locked_at=None, locked_by="",
+                    run_at=timezone.now() + retry_delay(job.attempts),
+                )
+                logger.warning("Job %s (%s) failed, attempt %s of %s", job.pk, job.task, job.attempts, job.max_attempts)
+                outcome = "retried"
+        else:
+            Job.objects.filter(pk=job.pk).delete()
+            outcome = "succeeded"
+        self.metrics.record(outcome, time.monotonic() - started)
+
+    def run_once(self):
+        jobs = self.claim()
+        for job in jobs:
+            self.execute(job)
+        return len(jobs)
+
+    def run(self, burst=False):
+        last_release = 0.0
+        try:
+            while not self.stop.is_set():
+                try:
+                    if time.monotonic() - last_release > self.lock_timeout.total_seconds() / 2:
+                        self.release_stale()
+                        last_release = time.monotonic()
+                    if self.run_once():
+                        continue
+                except DatabaseError:
+                    # Lost connection, failover, lock timeout: back off rather than let the thread die
+                    logger.exception("Job worker %s hit a database error", self.name)
+                    close_old_connections()
+                if burst:
+                    break
+                self.stop.wait(self.poll_interval)
+                close_old_connections()
+        finally:
+            close_old_connections()
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import Worker, enqueue, queue_stats
+
+calls = []
+
+
+def record(value):
+    calls.append(value)
+
+
+def fail():
+    raise RuntimeError("boom")
+
+
+@override_settings(JOBS_BACKOFF_SECONDS=60)
+class WorkerTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(["default"])
+
+    def test_successful_jobs_run_once_and_are_deleted(self):
+        enqueue(record, value=1)
+        enqueue("jobs.tests.record", value=2)
+
+        self.assertEqual(self.worker.run_once(), 2)
+
+        self.assertEqual(calls, [1, 2])
+        self.assertFalse(Job.objects.exists())
+
+    def test_jobs_wait_for_run_at_and_their_queue(self):
+        enqueue(record, value=1, run_at=timezone.now() + timedelta(hours=1))
+        enqueue(record, queue="other", value=2)
+
+        self.assertEqual(self.worker.run_once(), 0)
+        self.assertEqual(calls, [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        job = enqueue(fail, max_attempts=3)
+
+        self.worker.run_once()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_QUEUED, 1))
+        self.assertIn("RuntimeError: boom", job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=30))
+        self.assertEqual(self.worker.run_once(), 0)
+
+    def test_job_is_dead_lettered_after_max_attempts(self):
+        job = enqueue(fail, max_attempts=2)
+
+        for _ in range(2):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            self.worker.run_once()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_DEAD, 2))
+        self.assertEqual(queue_stats(["default"])["dead"]["count"], 1)
+
+    def test_stale_running_jobs_are_requeued_or_dead_lettered(self):
+        stale = timezone.now() - timedelta(hours=1)
+        retry = enqueue(record, value=1, max_attempts=3)
+        final = enqueue(record, value=2, max_attempts=3)
+        Job.objects.filter(pk=retry.pk).update(status=Job.STATUS_RUNNING, attempts=1, locked_at=stale)
+        Job.objects.filter(pk=final.pk).update(status=Job.STATUS_RUNNING, attempts=3, locked_at=stale)
+
+        self.assertEqual(self.worker.release_stale(), 1)
+
+        self.assertEqual(Job.objects.get(pk=retry.pk).status, Job.STATUS_QUEUED)
+        self.assertEqual(Job.objects.get(pk=final.pk).status, Job.STATUS_DEAD)